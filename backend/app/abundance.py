@@ -0,0 +1,119 @@
+"""Cohort-level samples x taxa abundance matrix.
+
+Built from bins (``sample_id``, ``taxonomy``, ``abundance``) with one row per
+sample that has bins; several bins of the same taxon in a sample are summed.
+Each row carries its patient's ``condition`` / ``cohort`` so cohort aggregates
+and differential abundance reduce to masked column statistics. Differential
+abundance averages each patient's samples first, so patients (not samples) are
+the statistical unit, as in pathway enrichment.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from .stats import case_control
+
+
+@dataclass
+class AbundanceMatrix:
+    sample_ids: List[str]
+    taxa: List[str]
+    values: sparse.csr_matrix  # samples x taxa
+    sample_meta: List[Dict[str, Optional[str]]]  # patient_id / condition / cohort per row
+
+    def labels(self, field: str) -> np.ndarray:
+        return np.array([m.get(field) for m in self.sample_meta], dtype=object)
+
+    def to_dict(self) -> Dict[str, Any]:
+        dense = self.values.toarray()
+        return {
+            "taxa": self.taxa,
+            "samples": [
+                {"sample_id": sid, **meta, "abundance": [round(float(v), 6) for v in dense[i]]}
+                for i, (sid, meta) in enumerate(zip(self.sample_ids, self.sample_meta))
+            ],
+        }
+
+    def cohort_summary(self, field: str = "cohort") -> List[Dict[str, Any]]:
+        """Mean abundance and prevalence per taxon for each value of ``field``."""
+        labels = self.labels(field)
+        groups = sorted({g for g in labels if g is not None})
+        if not groups:
+            return []
+        gidx = {g: k for k, g in enumerate(groups)}
+        rows = np.flatnonzero(labels != None)  # noqa: E711 (elementwise on object array)
+        member = sparse.csr_matrix(
+            (np.ones(len(rows)), ([gidx[g] for g in labels[rows]], rows)),
+            shape=(len(groups), len(self.sample_ids)),
+        )
+        counts = np.asarray(member.sum(axis=1)).ravel()
+        means = (member @ self.values).toarray() / counts[:, None]
+        present = self.values.copy()
+        present.data = (present.data > 0).astype(np.float64)
+        prevalence = (member @ present).toarray() / counts[:, None]
+        return [
+            {
+                field: g,
+                "n_samples": int(counts[k]),
+                "taxa": {
+                    t: {"mean_abundance": round(float(means[k, j]), 6), "prevalence": round(float(prevalence[k, j]), 4)}
+                    for j, t in enumerate(self.taxa)
+                    if prevalence[k, j] > 0
+                },
+            }
+            for k, g in enumerate(groups)
+        ]
+
+    def patient_labels(self, field: str) -> Dict[str, Optional[str]]:
+        return {m["patient_id"]: m.get(field) for m in self.sample_meta if m.get("patient_id") is not None}
+
+    def by_patient(self, field: str = "cohort") -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """(patient ids, patients x taxa mean abundance over each patient's samples, ``field`` per patient)."""
+        pids = np.array([m.get("patient_id") for m in self.sample_meta], dtype=object)
+        rows = np.flatnonzero(pids != None)  # noqa: E711 (elementwise on object array)
+        patients = sorted(set(pids[rows]))
+        pidx = {p: k for k, p in enumerate(patients)}
+        member = sparse.csr_matrix(
+            (np.ones(len(rows)), ([pidx[p] for p in pids[rows]], rows)),
+            shape=(len(patients), len(self.sample_ids)),
+        )
+        counts = np.asarray(member.sum(axis=1)).ravel()
+        means = (member @ self.values).toarray() / np.maximum(counts, 1)[:, None]
+        labels = self.patient_labels(field)
+        return patients, means, np.array([labels[p] for p in patients], dtype=object)
+
+    def differential(self, field: str = "cohort", case: str = "Case", control: str = "Control") -> List[Dict[str, Any]]:
+        """Case vs control per taxon with patients as the unit: repeated samples are averaged, not replicates."""
+        _, means, labels = self.by_patient(field)
+        return case_control(means, self.taxa, labels == case, labels == control, key="taxon")
+
+
+def build_abundance_matrix(
+    bins: Sequence[Dict[str, Any]],
+    sample_index: Dict[str, Dict[str, Any]],
+    patient_index: Dict[str, Dict[str, Any]],
+) -> AbundanceMatrix:
+    sample_ids = sorted({b.get("sample_id") for b in bins if b.get("sample_id")})
+    taxa = sorted({b.get("taxonomy") or "unclassified" for b in bins if b.get("sample_id")})
+    srow = {s: i for i, s in enumerate(sample_ids)}
+    tcol = {t: j for j, t in enumerate(taxa)}
+    kept = [b for b in bins if b.get("sample_id")]
+    values = sparse.csr_matrix(
+        (
+            np.fromiter((float(b.get("abundance") or 0.0) for b in kept), dtype=np.float64, count=len(kept)),
+            (
+                np.fromiter((srow[b["sample_id"]] for b in kept), dtype=np.int64, count=len(kept)),
+                np.fromiter((tcol[b.get("taxonomy") or "unclassified"] for b in kept), dtype=np.int64, count=len(kept)),
+            ),
+        ),
+        shape=(len(sample_ids), len(taxa)),
+    )
+    values.sum_duplicates()  # several bins of one taxon in a sample add up
+    meta = []
+    for sid in sample_ids:
+        pid = (sample_index.get(sid) or {}).get("patient_id")
+        patient = patient_index.get(pid) or {}
+        meta.append({"patient_id": pid, "condition": patient.get("condition"), "cohort": patient.get("cohort")})
+    return AbundanceMatrix(sample_ids=sample_ids, taxa=taxa, values=values, sample_meta=meta)
@@ -0,0 +1,331 @@
+"""Lazily loaded ASMA dataset.
+
+Nothing is read at import or construction time. Each entity (patients.csv,
+interactions.json, ...) is parsed on first access, and each derived index on
+first use, under a lock of its own so a slow load never holds up unrelated
+ones (async handlers go through ``main.off_loop`` so loads never run on the
+event loop). A file that fails to load only breaks the endpoints that need it:
+the error is kept in :meth:`Dataset.status` and raised as
+:class:`DatasetError`. Background jobs (graph analytics, similarity index,
+formulation scores, ...) are cached per dataset version and run on the executor
+passed in by the app, normally its worker pool: the module-level ``*_task``
+functions here and in ``tasks`` are what runs there, each reading the
+worker's own :func:`worker_dataset`.
+"""
+import csv
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from functools import partial
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .formulations import FormulationStore, changed_isolates, score_breakdown
+
+REPO_ROOT: Path = Path(__file__).resolve().parents[2]
+# Saved formulations live outside the data dir so the dataset stays read-only (seeded from formulations.json).
+DEFAULT_FORMULATIONS_PATH: Path = REPO_ROOT / "state" / "formulations.json"
+
+
+def resolve_data_dir() -> Path:
+    """ASMA_DATA_DIR, else DEMO_DATA_DIR, else <repo>/demo_data. Existence is checked on load, not here."""
+    env = os.getenv("ASMA_DATA_DIR") or os.getenv("DEMO_DATA_DIR")
+    return Path(env or (REPO_ROOT / "demo_data")).resolve()
+
+
+def load_csv(path: Path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def load_json(path: Path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_jsonl(path: Path):
+    """Tolerant loader: supports JSONL or a JSON array."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read().strip()
+    if not text:
+        return []
+    if text.lstrip().startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in (ln.strip() for ln in text.splitlines()) if line]
+
+
+ENTITIES: Dict[str, Tuple[str, Callable[[Path], Any]]] = {
+    "patients": ("patients.csv", load_csv),
+    "samples": ("samples.csv", load_csv),
+    "bins": ("bins.jsonl", load_jsonl),
+    "isolates": ("isolates.jsonl", load_jsonl),
+    "interactions": ("interactions.json", load_json),
+    "prebiotics": ("prebiotics.csv", load_csv),
+    "formulations": ("formulations.json", load_json),
+}
+# formulations.json only seeds the saved-formulation store (see FormulationStore); not part of the dataset version.
+VERSIONED_ENTITIES = ["patients", "samples", "bins", "isolates", "interactions", "prebiotics"]
+# What the startup hook warms before reporting ready; interactions load on first use.
+WARM_ENTITIES = ["patients", "samples", "bins", "isolates", "prebiotics"]
+
+
+def _lazy(module: str, name: str) -> Callable[..., Any]:
+    """``module.name``, imported on first call: the numpy/scipy builders stay out of the app's import."""
+    def call(*args: Any) -> Any:
+        return getattr(import_module(module, __package__), name)(*args)
+    return call
+
+
+build_abundance_matrix = _lazy(".abundance", "build_abundance_matrix")
+build_pathway_matrix = _lazy(".pathways", "build_pathway_matrix")
+build_time_index = _lazy(".timeline", "build_time_index")
+build_isolate_index = _lazy(".similarity", "build_isolate_index")
+compute_graph_analytics = _lazy(".graph_analytics", "compute_graph_analytics")
+
+
+def _group_by(rows: List[Dict[str, Any]], key: str) -> Dict[Any, List[Dict[str, Any]]]:
+    out: Dict[Any, List[Dict[str, Any]]] = {}
+    for r in rows:
+        out.setdefault(r.get(key), []).append(r)
+    return out
+
+
+class DatasetError(RuntimeError):
+    """An entity could not be loaded (missing/unreadable/invalid file)."""
+
+
+class Dataset:
+    def __init__(self, data_dir: Path, executor: Executor, formulations_path: Optional[Path] = None):
+        self.data_dir = Path(data_dir)
+        self.executor = executor
+        self.formulations_path = Path(formulations_path or DEFAULT_FORMULATIONS_PATH)
+        self._lock = threading.Lock()  # short critical sections only (lock table, caches); never held while loading
+        self._jobs_lock = threading.Lock()
+        self._locks: Dict[str, threading.Lock] = {}  # one per entity / index, so loads never wait on unrelated ones
+        self._store_lock = threading.RLock()
+        self._generation = 0  # bumped by reload(); loads that straddle a reload are not cached
+        self._entities: Dict[str, Any] = {}
+        self._derived: Dict[str, Any] = {}
+        self._errors: Dict[str, str] = {}
+        self._version: Optional[str] = None
+        self._jobs: Dict[Tuple[str, str], Future] = {}
+        self._store: Optional[FormulationStore] = None
+        self._scored_from: Optional[Tuple[list, list]] = None  # (isolates, interactions) the store's scores reflect
+
+    def _load(self, cache: Dict[str, Any], name: str, build: Callable[[], Any]):
+        try:
+            return cache[name]
+        except KeyError:
+            pass
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name in cache:
+                return cache[name]
+            gen = self._generation
+            value = build()
+            with self._lock:
+                if gen == self._generation:
+                    cache[name] = value
+            return value
+
+    def loaded(self, name: str) -> bool:
+        """Whether the entity or derived index ``name`` is already in memory (accessing it won't load)."""
+        return name in self._entities or name in self._derived
+
+    # ---- entities ----
+    def entity(self, name: str):
+        def load():
+            filename, loader = ENTITIES[name]
+            try:
+                value = loader(self.data_dir / filename)
+            except (OSError, ValueError) as e:  # json.JSONDecodeError is a ValueError
+                self._errors[name] = f"{type(e).__name__}: {e}"
+                raise DatasetError(f"{filename} unavailable ({self._errors[name]})") from e
+            self._errors.pop(name, None)
+            return value
+
+        return self._load(self._entities, name, load)
+
+    patients = property(lambda self: self.entity("patients"))
+    samples = property(lambda self: self.entity("samples"))
+    bins = property(lambda self: self.entity("bins"))
+    isolates = property(lambda self: self.entity("isolates"))
+    interactions = property(lambda self: self.entity("interactions"))
+    prebiotics = property(lambda self: self.entity("prebiotics"))
+    formulations = property(lambda self: self.entity("formulations"))
+
+    def warm(self, names: List[str] = WARM_ENTITIES) -> Dict[str, str]:
+        """Load ``names`` (and their indices) now; returns the errors instead of raising."""
+        for name in names:
+            try:
+                self.entity(name)
+            except DatasetError:
+                pass
+        for name, index in (("patients", "patient_index"), ("samples", "sample_index"),
+                            ("bins", "bin_index"), ("bins", "bins_by_sample"), ("isolates", "isolate_index")):
+            if name in names and name in self._entities:
+                getattr(self, index)
+        return {n: self._errors[n] for n in names if n in self._errors}
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "data_dir": str(self.data_dir),
+            "loaded": sorted(self._entities),
+            "errors": dict(self._errors),
+        }
+
+    def is_ready(self) -> bool:
+        return all(n in self._entities for n in WARM_ENTITIES)
+
+    # ---- derived indices (built on first use) ----
+    def derived(self, name: str, build: Callable[[], Any]):
+        return self._load(self._derived, name, build)
+
+    patient_index = property(lambda self: self.derived("patient_index", lambda: {p.get("patient_id"): p for p in self.patients}))
+    sample_index = property(lambda self: self.derived("sample_index", lambda: {s.get("sample_id"): s for s in self.samples}))
+    bin_index = property(lambda self: self.derived("bin_index", lambda: {b.get("bin_id"): b for b in self.bins}))
+    bins_by_sample = property(lambda self: self.derived("bins_by_sample", lambda: _group_by(self.bins, "sample_id")))
+    isolate_index = property(lambda self: self.derived("isolate_index", lambda: {i.get("isolate_id"): i for i in self.isolates}))
+    pathway_matrix = property(lambda self: self.derived("pathway_matrix", lambda: build_pathway_matrix(self.bins)))
+    abundance_matrix = property(lambda self: self.derived(
+        "abundance_matrix", lambda: build_abundance_matrix(self.bins, self.sample_index, self.patient_index)))
+    # (sample ids, pathways, matrix) of abundance-weighted coverage per sample
+    sample_coverage = property(lambda self: self.derived(
+        "sample_coverage", lambda: self.pathway_matrix.coverage(self.pathway_matrix.sample_ids)))
+    time_index = property(lambda self: self.derived("time_index", lambda: build_time_index(self.samples)))
+
+    # ---- versioning / reload ----
+    @property
+    def version(self) -> str:
+        """Fingerprint of the data files (name, size, mtime); cheap enough to compute without parsing."""
+        if self._version is None:
+            h = hashlib.sha1()
+            for name in VERSIONED_ENTITIES:
+                p = self.data_dir / ENTITIES[name][0]
+                st = p.stat() if p.exists() else None
+                h.update(f"{p.name}:{st.st_size if st else -1}:{st.st_mtime_ns if st else -1};".encode())
+            self._version = h.hexdigest()[:12]
+        return self._version
+
+    def reload(self) -> str:
+        """Drop every cached entity/index and rescore the formulations touched by the change.
+
+        The store's scores are diffed against the data they were computed from, which is only replaced
+        once a reload loads the new isolates and interactions; a reload that fails on a broken file
+        leaves it in place for the next one.
+        """
+        with self._store_lock:
+            with self._lock:
+                self._generation += 1
+                self._entities.clear()
+                self._derived.clear()
+                self._errors.clear()
+                self._version = None
+            if self._store is not None:
+                try:
+                    isolates, edges = self.isolates, self.interactions
+                except DatasetError:
+                    return self.version
+                old_isolates, old_edges = self._scored_from
+                self._store.invalidate(changed_isolates(old_isolates, isolates, old_edges, edges), self.score_fn(), self.version)
+                self._scored_from = (isolates, edges)
+        return self.version
+
+    # ---- background jobs, cached per version ----
+    def job(self, name: str, fn: Callable[[], Any]) -> Future:
+        """Future for ``name`` at the current version; submitted once, older versions dropped."""
+        key = (name, self.version)
+        with self._jobs_lock:
+            fut = self._jobs.get(key)
+            # A job that failed (e.g. on a broken file) or was cancelled (its pool broke) is retried on the next request.
+            if fut is None or (fut.done() and (fut.cancelled() or fut.exception() is not None)):
+                for k in [k for k in self._jobs if k[0] == name]:
+                    del self._jobs[k]
+                fut = self._jobs[key] = self.executor.submit(fn)
+            return fut
+
+    def graph_analytics_job(self) -> Future:
+        return self.job("graph_analytics", partial(graph_analytics_task, str(self.data_dir)))
+
+    def similarity_job(self) -> Future:
+        return self.job("isolate_similarity", partial(similarity_task, str(self.data_dir)))
+
+    # ---- formulations ----
+    def score_fn(self):
+        """The live formulation scorer; runs in a worker against that worker's interactions."""
+        return partial(score_task, str(self.data_dir))
+
+    @property
+    def formulation_store(self) -> FormulationStore:
+        """Created on first use: seeded from formulations.json unless the store file already exists."""
+        with self._store_lock:
+            if self._store is None:
+                seed = [] if self.formulations_path.exists() else self.formulations
+                scored_from = (self.isolates, self.interactions)
+                store = FormulationStore(self.formulations_path, seed, self.executor)
+                store.rescore_all(self.score_fn(), self.version)
+                self._scored_from = scored_from
+                self._store = store
+            return self._store
+
+
+_SHARED: Dict[str, Dataset] = {}
+# The dataset init_worker loaded in this pool process; always wins over _SHARED.
+_WORKER: Dict[str, Dataset] = {}
+# What a pool worker loads up front (see init_worker); the rest loads on first use.
+WORKER_ENTITIES = ["patients", "samples", "bins", "isolates", "interactions"]
+
+
+def register(ds: Dataset) -> Dataset:
+    """Make ``ds`` what :func:`worker_dataset` returns in this process (thread pools, tests)."""
+    _SHARED[str(ds.data_dir)] = ds
+    return ds
+
+
+def _worker_copy(data_dir: str) -> Dataset:
+    # Its own jobs run on one thread: a worker never starts a nested process pool.
+    return Dataset(Path(data_dir), ThreadPoolExecutor(max_workers=1))
+
+
+def worker_dataset(data_dir: str) -> Dataset:
+    """The dataset pool-side code reads: this worker's warmed one, else the registered one, else a lazy copy."""
+    ds = _WORKER.get(data_dir) or _SHARED.get(data_dir)
+    if ds is None:
+        ds = _SHARED.setdefault(data_dir, _worker_copy(data_dir))
+    return ds
+
+
+def init_worker(data_dir: str):
+    """Pool initializer: lower the worker's CPU priority, then load the entities its tasks need.
+
+    With fewer cores than busy processes the scheduler then favours the server process, so
+    point lookups keep their latency while heavy work is queued.
+    """
+    nice = int(os.getenv("ASMA_WORKER_NICE", "10"))
+    if nice and hasattr(os, "nice"):
+        os.nice(nice)
+    ds = _WORKER[data_dir] = _worker_copy(data_dir)
+    ds.warm(WORKER_ENTITIES)
+
+
+def graph_analytics_task(data_dir: str):
+    ds = worker_dataset(data_dir)
+    return compute_graph_analytics(ds.isolates, ds.interactions)
+
+
+def similarity_task(data_dir: str):
+    ds = worker_dataset(data_dir)
+    return build_isolate_index(ds.isolates, ds.bins)
+
+
+def score_task(data_dir: str, organisms: List[str]) -> Dict[str, Any]:
+    return score_breakdown(organisms, worker_dataset(data_dir).interactions)
+
+
+def index_call(data_dir: str, index: str, method: str, *args: Any):
+    """``worker_dataset(data_dir).<index>.<method>(*args)``, e.g. a cohort summary on the abundance matrix."""
+    return getattr(getattr(worker_dataset(data_dir), index), method)(*args)
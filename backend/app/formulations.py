@@ -0,0 +1,257 @@
+"""Persistent formulation registry with a dependency-tracked score cache.
+
+Saved formulations are kept as plain inputs (organisms, prebiotics, notes) in a
+JSON file; scores are never persisted. Each cached score records the isolates
+and interaction edges it was computed from, and a reverse index maps isolate ->
+formulations so a data reload only rescores formulations that touch a changed
+isolate. ``score_fn(organisms)`` runs on the executor supplied by the Dataset
+(the worker pool), so it must be picklable there; the cache entry is recorded
+by a done-callback in this process. A score that fails is reported as
+``"error"`` and retried on the next access or reload.
+"""
+import json
+import os
+import threading
+from concurrent.futures import Executor, Future, TimeoutError as FutureTimeout, wait as futures_wait
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+ScoreFn = Callable[[List[str]], Dict[str, Any]]
+
+# Persisted fields; anything else (e.g. a legacy hard-coded score_predicted) is dropped.
+STORED_FIELDS = ("formulation_id", "organisms", "prebiotics", "notes")
+
+
+def score_breakdown(organisms: List[str], edges: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """Live formulation score over the interactions among ``organisms``, with the sums behind it."""
+    from .uncertainty import formulation_score  # numpy: only the scoring worker needs it
+
+    chosen = set(organisms or [])
+    comp_sum = inhib_sum = compo_sum = 0.0
+    comp_list: List[Dict[str, Any]] = []
+    inhib_list: List[Dict[str, Any]] = []
+    comp_count = inhib_count = compo_count = 0
+
+    for e in edges:
+        a = e.get("source_isolate")
+        b = e.get("target_isolate")
+        if a in chosen and b in chosen:
+            t = e.get("type")
+            s = float(e.get("score", 0.5))
+            if t == "complementarity":
+                comp_sum += s
+                comp_count += 1
+                comp_list.append(e)
+            elif t == "inhibition":
+                inhib_sum += s
+                inhib_count += 1
+                inhib_list.append(e)
+            elif t == "competition":
+                compo_sum += s
+                compo_count += 1
+                inhib_list.append({"type": "competition", **e})
+
+    score = float(formulation_score(comp_sum, inhib_sum, compo_sum, inhib_count))
+    return {
+        "organisms": list(chosen),
+        "sum_complementarity": round(comp_sum, 3),
+        "sum_inhibition": round(inhib_sum, 3),
+        "sum_competition": round(compo_sum, 3),
+        "avg_inhibition": round(inhib_sum / max(1, inhib_count), 3) if inhib_count else 0.0,
+        "counts": {"complementarity": comp_count, "inhibition": inhib_count, "competition": compo_count},
+        "edges_included": {"complementarity": comp_list, "inhibition_or_competition": inhib_list},
+        "score_predicted": round(score, 2),
+    }
+
+
+def edge_key(e: Dict[str, Any]) -> Tuple[str, str, str]:
+    return (e.get("source_isolate"), e.get("target_isolate"), e.get("type"))
+
+
+def changed_isolates(
+    old_isolates: Sequence[Dict[str, Any]],
+    new_isolates: Sequence[Dict[str, Any]],
+    old_edges: Sequence[Dict[str, Any]],
+    new_edges: Sequence[Dict[str, Any]],
+) -> Set[str]:
+    """Isolates whose record changed, plus endpoints of every added/removed/modified edge."""
+    changed: Set[str] = set()
+    old_i = {i.get("isolate_id"): i for i in old_isolates}
+    new_i = {i.get("isolate_id"): i for i in new_isolates}
+    changed.update(k for k in old_i.keys() | new_i.keys() if old_i.get(k) != new_i.get(k))
+    old_e = {edge_key(e): e for e in old_edges}
+    new_e = {edge_key(e): e for e in new_edges}
+    for k in old_e.keys() | new_e.keys():
+        if old_e.get(k) != new_e.get(k):
+            changed.update(x for x in k[:2] if x)
+    changed.discard(None)
+    return changed
+
+
+class FormulationStore:
+    def __init__(self, path: Path, seed: Iterable[Dict[str, Any]], executor: Executor):
+        self.path = Path(path)
+        self.executor = executor
+        self._lock = threading.Lock()
+        records = json.loads(self.path.read_text(encoding="utf-8")) if self.path.exists() else list(seed)
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._scores: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, Future] = {}
+        self._errors: Dict[str, str] = {}  # last failure per formulation, until a rescore lands
+        self._score_fn: Optional[ScoreFn] = None
+        self._version: Optional[str] = None
+        self._generation: Dict[str, int] = {}
+        self._by_isolate: Dict[str, Set[str]] = {}
+        for r in records:
+            rec = self._clean(r)
+            self._records[rec["formulation_id"]] = rec
+            self._index(rec)
+
+    @staticmethod
+    def _clean(r: Dict[str, Any]) -> Dict[str, Any]:
+        rec = {k: r.get(k) for k in STORED_FIELDS}
+        rec["organisms"] = list(rec["organisms"] or [])
+        rec["prebiotics"] = list(rec["prebiotics"] or [])
+        return rec
+
+    def _index(self, rec: Dict[str, Any]):
+        for iso in rec["organisms"]:
+            self._by_isolate.setdefault(iso, set()).add(rec["formulation_id"])
+
+    def _unindex(self, rec: Dict[str, Any]):
+        for iso in rec["organisms"]:
+            self._by_isolate.get(iso, set()).discard(rec["formulation_id"])
+
+    def _persist(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(list(self._records.values()), indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def next_id(self) -> str:
+        nums = [int(k[1:]) for k in self._records if k and k[0] == "F" and k[1:].isdigit()]
+        return f"F{max(nums, default=0) + 1:03d}"
+
+    # ---- scoring ----
+    def _land(self, fid: str, gen: int, organisms: List[str], version: str, landed: Future, fut: Future):
+        entry: Optional[Dict[str, Any]] = None
+        error = None
+        try:
+            bd = fut.result()
+            included = bd["edges_included"]["complementarity"] + bd["edges_included"]["inhibition_or_competition"]
+            entry = {
+                "score_predicted": bd["score_predicted"],
+                "counts": bd["counts"],
+                "depends_on": {
+                    "isolates": sorted(set(organisms)),
+                    "edges": [{"source": a, "target": b, "type": t} for a, b, t in sorted({edge_key(e) for e in included})],
+                },
+                "dataset_version": version,
+            }
+        except BaseException as e:  # noqa: BLE001 (worker error, cancelled job, broken pool: recorded, retried on access)
+            error = f"{type(e).__name__}: {e}"
+        with self._lock:
+            # A newer save or reload may have rescheduled this formulation; only the latest run lands.
+            if self._generation.get(fid) == gen:
+                self._pending.pop(fid, None)
+                if entry is None:
+                    self._errors[fid] = error
+                else:
+                    self._scores[fid] = entry
+                    self._errors.pop(fid, None)
+        landed.set_result(entry)  # never an exception: waiters read the outcome from the store
+
+    def rescore(self, ids: Iterable[str], score_fn: ScoreFn, version: str) -> List[str]:
+        """Drop the cached scores for ``ids`` and recompute them in the background."""
+        scheduled = []
+        with self._lock:
+            self._score_fn, self._version = score_fn, version  # what a failed score is retried with
+            for fid in ids:
+                rec = self._records.get(fid)
+                if rec is None:
+                    continue
+                self._scores.pop(fid, None)
+                gen = self._generation[fid] = self._generation.get(fid, 0) + 1
+                # Waiters watch ``landed``, which resolves only after the outcome is recorded.
+                landed = self._pending[fid] = Future()
+                organisms = list(rec["organisms"])
+                scheduled.append((fid, self.executor.submit(score_fn, organisms),
+                                  partial(self._land, fid, gen, organisms, version, landed)))
+        for _, fut, land in scheduled:
+            fut.add_done_callback(land)  # outside the lock: runs inline if the job already finished
+        return [fid for fid, _, _ in scheduled]
+
+    def _retry_failed(self, ids: Iterable[str]) -> List[str]:
+        """Reschedule the formulations among ``ids`` whose last score failed and is not being retried."""
+        with self._lock:
+            failed = [fid for fid in ids if fid in self._errors and fid not in self._pending]
+            score_fn, version = self._score_fn, self._version
+        return self.rescore(failed, score_fn, version) if failed and score_fn is not None else []
+
+    def rescore_all(self, score_fn: ScoreFn, version: str) -> List[str]:
+        return self.rescore(list(self._records), score_fn, version)
+
+    def invalidate(self, isolates: Iterable[str], score_fn: ScoreFn, version: str) -> List[str]:
+        """Rescore formulations that contain one of ``isolates``, plus any whose last score failed."""
+        with self._lock:
+            affected = set().union(*(self._by_isolate.get(i, set()) for i in isolates), self._errors)
+        return self.rescore(sorted(affected), score_fn, version)
+
+    # ---- access ----
+    def save(self, record: Dict[str, Any], score_fn: ScoreFn, version: str) -> str:
+        with self._lock:
+            rec = self._clean(record)
+            rec["formulation_id"] = rec["formulation_id"] or self.next_id()
+            old = self._records.get(rec["formulation_id"])
+            if old is not None:
+                self._unindex(old)
+            self._records[rec["formulation_id"]] = rec
+            self._index(rec)
+            self._persist()
+        self.rescore([rec["formulation_id"]], score_fn, version)
+        return rec["formulation_id"]
+
+    def get(self, fid: str, wait: float = 0.0) -> Optional[Dict[str, Any]]:
+        """The formulation and its score; a failed score is retried here and reported as ``"error"`` until one lands."""
+        self._retry_failed([fid])
+        with self._lock:
+            rec = self._records.get(fid)
+            fut = self._pending.get(fid)
+        if rec is None:
+            return None
+        if fut is not None and wait > 0:
+            try:
+                fut.result(timeout=wait)
+            except FutureTimeout:
+                pass
+        return self._view(fid, rec)
+
+    def _view(self, fid: str, rec: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            entry = self._scores.get(fid)
+            error = self._errors.get(fid)
+        if entry is not None:
+            return {**rec, "score_status": "fresh", **entry}
+        if error is not None:
+            return {**rec, "score_status": "error", "score_predicted": None, "score_error": error}
+        return {**rec, "score_status": "pending", "score_predicted": None}
+
+    def pending(self, ids: Optional[Iterable[str]] = None) -> List[Future]:
+        """Unfinished score futures for ``ids`` (default: all), after rescheduling failed ones; for async waiters."""
+        with self._lock:
+            ids = list(self._records) if ids is None else list(ids)
+        self._retry_failed(ids)
+        with self._lock:
+            return [f for f in (self._pending.get(fid) for fid in ids) if f is not None and not f.done()]
+
+    def list_all(self, wait: float = 0.0) -> List[Dict[str, Any]]:
+        """Every formulation; waits at most ``wait`` seconds in total (not per record) for pending scores."""
+        with self._lock:
+            ids = list(self._records)
+        pending = self.pending(ids)
+        if pending and wait > 0:
+            futures_wait(pending, timeout=wait)
+        with self._lock:
+            records = [(fid, self._records[fid]) for fid in ids if fid in self._records]
+        return [self._view(fid, rec) for fid, rec in records]
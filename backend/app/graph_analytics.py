@@ -0,0 +1,195 @@
+"""Interaction-network analytics: degree/weighted centrality, PageRank, communities.
+
+All metrics are computed with NumPy over edge arrays (bincount / unique), so the
+cost grows with the number of interactions, not with isolates squared.
+The app runs :func:`compute_graph_analytics` once per dataset version in a
+background worker and caches the result; NumPy is imported by the functions
+that use it, so the app can import :data:`ALL_TYPES` / :func:`top_nodes` cheaply.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Dict, List, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Interaction types whose direction carries meaning; everything else
+# (cooccurrence, complementarity, ...) is treated as symmetric.
+DIRECTED_TYPES = {"competition", "inhibition"}
+
+ALL_TYPES = "all"
+
+
+def _edge_arrays(
+    node_index: Dict[str, int], edges: Sequence[Dict[str, Any]]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Return (src, dst, weight, directed) arrays for the edges whose endpoints are indexed."""
+    import numpy as np
+
+    src: List[int] = []
+    dst: List[int] = []
+    w: List[float] = []
+    directed: List[bool] = []
+    for e in edges:
+        a = node_index.get(e.get("source_isolate"))
+        b = node_index.get(e.get("target_isolate"))
+        if a is None or b is None:
+            continue
+        src.append(a)
+        dst.append(b)
+        w.append(float(e.get("score") or 0.0))
+        directed.append(e.get("type") in DIRECTED_TYPES)
+    return (
+        np.asarray(src, dtype=np.int64),
+        np.asarray(dst, dtype=np.int64),
+        np.asarray(w, dtype=np.float64),
+        np.asarray(directed, dtype=bool),
+    )
+
+
+def pagerank(
+    n: int,
+    src: np.ndarray,
+    dst: np.ndarray,
+    w: np.ndarray,
+    damping: float = 0.85,
+    tol: float = 1e-10,
+    max_iter: int = 100,
+) -> np.ndarray:
+    """Weighted PageRank by power iteration over the edge list (dangling mass spread uniformly)."""
+    import numpy as np
+
+    if n == 0:
+        return np.zeros(0)
+    out_w = np.bincount(src, weights=w, minlength=n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        norm = np.where(out_w[src] > 0, w / out_w[src], 0.0)
+    dangling = out_w <= 0
+    r = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        spread = np.bincount(dst, weights=norm * r[src], minlength=n)
+        nxt = (1.0 - damping) / n + damping * (spread + r[dangling].sum() / n)
+        done = np.abs(nxt - r).sum() < tol
+        r = nxt
+        if done:
+            break
+    return r / r.sum()
+
+
+def label_propagation(
+    n: int, src: np.ndarray, dst: np.ndarray, w: np.ndarray, max_iter: int = 30
+) -> np.ndarray:
+    """Synchronous weighted label propagation on the undirected graph.
+
+    Each node keeps a self-vote equal to its strongest incident edge and ties go
+    to the smallest label, which keeps the synchronous update from oscillating
+    on bipartite pieces. Returns community ids ``0..k-1`` ordered by size.
+    """
+    import numpy as np
+
+    labels = np.arange(n, dtype=np.int64)
+    if n == 0 or len(src) == 0:
+        return labels
+    u = np.concatenate([src, dst])
+    v = np.concatenate([dst, src])
+    ww = np.concatenate([w, w])
+    self_w = np.zeros(n)
+    np.maximum.at(self_w, u, ww)
+    nodes = np.arange(n, dtype=np.int64)
+    u = np.concatenate([u, nodes])
+    v = np.concatenate([v, nodes])
+    ww = np.concatenate([ww, self_w])
+    for _ in range(max_iter):
+        keys, inv = np.unique(u * n + labels[v], return_inverse=True)
+        totals = np.bincount(inv, weights=ww)
+        node, lab = keys // n, keys % n
+        order = np.lexsort((lab, -totals, node))
+        node_s = node[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = node_s[1:] != node_s[:-1]
+        nxt = labels.copy()
+        nxt[node_s[first]] = lab[order][first]
+        if np.array_equal(nxt, labels):
+            break
+        labels = nxt
+    _, inverse, counts = np.unique(labels, return_inverse=True, return_counts=True)
+    rank = np.empty(len(counts), dtype=np.int64)
+    rank[np.argsort(-counts, kind="stable")] = np.arange(len(counts))
+    return rank[inverse]
+
+
+def analyze_graph(node_ids: List[str], edges: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """Compute per-node metrics and the community list for one edge set."""
+    import numpy as np
+
+    index = {nid: i for i, nid in enumerate(node_ids)}
+    n = len(node_ids)
+    src, dst, w, directed = _edge_arrays(index, edges)
+
+    out_deg = np.bincount(src, minlength=n)
+    in_deg = np.bincount(dst, minlength=n)
+    strength = np.bincount(src, weights=w, minlength=n) + np.bincount(dst, weights=w, minlength=n)
+    degree = out_deg + in_deg
+    max_deg = max(n - 1, 1)
+
+    # Symmetric edges walk both ways for PageRank; directed ones only forward.
+    sym = ~directed
+    pr = pagerank(
+        n,
+        np.concatenate([src, dst[sym]]),
+        np.concatenate([dst, src[sym]]),
+        np.concatenate([w, w[sym]]),
+    )
+    community = label_propagation(n, src, dst, w)
+
+    nodes = {
+        nid: {
+            "degree": int(degree[i]),
+            "in_degree": int(in_deg[i]),
+            "out_degree": int(out_deg[i]),
+            "degree_centrality": round(float(degree[i]) / max_deg, 4),
+            "weighted_degree": round(float(strength[i]), 4),
+            "pagerank": round(float(pr[i]), 6),
+            "community": int(community[i]),
+        }
+        for i, nid in enumerate(node_ids)
+    }
+    communities: List[Dict[str, Any]] = []
+    for c in range(int(community.max()) + 1 if n else 0):
+        members = [node_ids[i] for i in np.flatnonzero(community == c)]
+        communities.append({"community": c, "size": len(members), "members": sorted(members)})
+    return {"node_count": n, "edge_count": int(len(src)), "nodes": nodes, "communities": communities}
+
+
+def compute_graph_analytics(
+    isolates: Sequence[Dict[str, Any]], interactions: Sequence[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Analytics for the whole network (``"all"``) and for each interaction type.
+
+    The ``"all"`` graph spans every isolate plus any edge endpoint; per-type
+    graphs only include isolates that take part in an edge of that type.
+    """
+    all_ids: List[str] = []
+    seen = set()
+    for nid in [i.get("isolate_id") for i in isolates] + [
+        x for e in interactions for x in (e.get("source_isolate"), e.get("target_isolate"))
+    ]:
+        if nid and nid not in seen:
+            seen.add(nid)
+            all_ids.append(nid)
+
+    by_type: Dict[str, Any] = {ALL_TYPES: analyze_graph(all_ids, interactions)}
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for e in interactions:
+        grouped.setdefault(e.get("type") or "unknown", []).append(e)
+    for t, edges in sorted(grouped.items()):
+        endpoints = {x for e in edges for x in (e.get("source_isolate"), e.get("target_isolate"))}
+        ids = [nid for nid in all_ids if nid in endpoints]
+        by_type[t] = analyze_graph(ids, edges)
+    return {"types": sorted(by_type), "by_type": by_type}
+
+
+def top_nodes(result: Dict[str, Any], metric: str = "pagerank", k: int = 10) -> List[Dict[str, Any]]:
+    """Rank the nodes of one :func:`analyze_graph` result by ``metric`` (descending)."""
+    ranked = sorted(result["nodes"].items(), key=lambda kv: (-kv[1][metric], kv[0]))
+    return [{"isolate_id": nid, **metrics} for nid, metrics in ranked[:k]]
@@ -1,171 +1,388 @@
 from pathlib import Path
-from fastapi import FastAPI, Query, HTTPException, Response
+from fastapi import APIRouter, Depends, FastAPI, Query, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
-import csv
-import json
+from concurrent.futures import BrokenExecutor, CancelledError, Future, TimeoutError as FutureTimeout
 import os
-import io
-
-app = FastAPI(title="ASMA Demo API", version="0.3.2")
-
-REPO_ROOT: Path = Path(__file__).resolve().parents[2]
-DATA_DIR_ENV = os.getenv("ASMA_DATA_DIR") or os.getenv("DEMO_DATA_DIR")
-DATA_DIR: Path = Path(DATA_DIR_ENV or (REPO_ROOT / "demo_data")).resolve()
-print(f"[ASMA] REPO_ROOT = {REPO_ROOT}")
-print(f"[ASMA] DATA_DIR  = {DATA_DIR}")
-if not DATA_DIR.exists():
-    raise RuntimeError(f"Demo data folder not found: {DATA_DIR}. Set ASMA_DATA_DIR or DEMO_DATA_DIR.")
-
-def load_csv(path: Path):
-  with open(path, newline="", encoding="utf-8") as f:
-    return list(csv.DictReader(f))
-def load_json(path: Path):
-  with open(path, encoding="utf-8") as f:
-    return json.load(f)
-def load_jsonl(path: Path):
-  with open(path, "r", encoding="utf-8") as f:
-    text = f.read().strip()
-  if not text: return []
-  if text.lstrip().startswith("["):
-    return json.loads(text)
-  items = []
-  for line in text.splitlines():
-    line = line.strip()
-    if not line: continue
-    items.append(json.loads(line))
-  return items
-
-patients     = load_csv(DATA_DIR / "patients.csv")
-samples      = load_csv(DATA_DIR / "samples.csv")
-bins         = load_jsonl(DATA_DIR / "bins.jsonl")
-isolates     = load_jsonl(DATA_DIR / "isolates.jsonl")
-interactions = load_json(DATA_DIR / "interactions.json")
-prebiotics   = load_csv(DATA_DIR / "prebiotics.csv")
-formulations = load_json(DATA_DIR / "formulations.json")
-
-PATIENT_INDEX  = {p.get("patient_id"): p for p in patients}
-SAMPLE_INDEX   = {s.get("sample_id"): s for s in samples}
-BIN_INDEX      = {b.get("bin_id"): b for b in bins}
-ISOLATE_INDEX  = {i.get("isolate_id"): i for i in isolates}
+from contextlib import asynccontextmanager
+from datetime import date
+import asyncio
+import math
+from functools import partial
 
-ALLOWED_ORIGINS = [
-  "http://127.0.0.1:5174", "http://localhost:5174",
-  "http://127.0.0.1:5173", "http://localhost:5173",
-  "http://127.0.0.1:3000", "http://localhost:3000",
-]
-app.add_middleware(
-  CORSMiddleware,
-  allow_origins=ALLOWED_ORIGINS,
-  allow_credentials=False,
-  allow_methods=["*"],
-  allow_headers=["*"],
-)
-
-@app.get("/health")
-def health():
-  return {"status": "ok", "data_dir": str(DATA_DIR)}
-
-@app.get("/patients")
-def get_patients(): return patients
-
-@app.get("/samples")
-def get_samples(patient_id: Optional[str] = None):
+from . import tasks
+from .dataset import DEFAULT_FORMULATIONS_PATH, REPO_ROOT, WARM_ENTITIES, Dataset, DatasetError, index_call, init_worker, resolve_data_dir
+from .formulations import FormulationStore
+from .graph_analytics import ALL_TYPES, top_nodes
+from .workers import BoundedPool
+
+# ---- Background analytics: computed once per dataset version on the worker pool, cached on the Dataset ----
+ANALYTICS_WAIT_S = float(os.getenv("ASMA_ANALYTICS_WAIT_S", "2.0"))
+
+def job_lost() -> HTTPException:
+  # The job's worker crashed or its pool was replaced; the next request resubmits it (see Dataset.job).
+  return HTTPException(status_code=503, detail="background job lost to a worker restart, retry later", headers={"Retry-After": "1"})
+
+def job_result(fut: Future, wait: float = ANALYTICS_WAIT_S):
+  """Result of a background job, or None if it is still running after `wait` seconds."""
+  try:
+    return fut.result(timeout=wait)
+  except FutureTimeout:
+    return None
+  except (BrokenExecutor, CancelledError):
+    raise job_lost()
+
+async def job_result_async(fut: Future, wait: float = ANALYTICS_WAIT_S):
+  """Awaitable job_result for async handlers: waits without holding a threadpool slot."""
+  try:
+    return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(fut)), wait)
+  except asyncio.TimeoutError:
+    return None
+  except BrokenExecutor:
+    raise job_lost()
+  except asyncio.CancelledError:
+    if not fut.cancelled():  # this request was cancelled, not the job
+      raise
+    raise job_lost()
+
+async def scores_landed(store: FormulationStore, ids: Optional[List[str]] = None, wait: float = ANALYTICS_WAIT_S):
+  """Wait at most `wait` seconds in total for the formulation scores of ``ids`` (default all) to land, off the threadpool."""
+  pending = store.pending(ids)
+  if pending:
+    await asyncio.wait([asyncio.wrap_future(f) for f in pending], timeout=wait)
+
+def job_pending(ds: Dataset):
+  return JSONResponse(status_code=202, content={"status": "computing", "dataset_version": ds.version})
+
+async def off_loop(ds: Dataset, name: str):
+  """``getattr(ds, name)`` for async handlers: an entity/index not loaded yet loads in the threadpool, never on the event loop."""
+  if ds.loaded(name):
+    return getattr(ds, name)
+  return await run_in_threadpool(getattr, ds, name)
+
+def get_dataset(request: Request) -> Dataset:
+  return request.app.state.dataset
+
+def get_heavy_pool(request: Request) -> BoundedPool:
+  return request.app.state.heavy_pool
+
+router = APIRouter()
+
+@router.get("/health")
+async def health(ds: Dataset = Depends(get_dataset)):
+  return {"status": "ok", "data_dir": str(ds.data_dir)}
+
+@router.get("/ready")
+async def ready(response: Response, ds: Dataset = Depends(get_dataset)):
+  """200 once the startup warm-up has loaded the core entities; 503 while starting or if one failed."""
+  status = ds.status()
+  if ds.is_ready():
+    return {"status": "ready", **status}
+  response.status_code = 503
+  failed = any(n in status["errors"] for n in WARM_ENTITIES)
+  return {"status": "error" if failed else "starting", **status}
+
+@router.get("/admin/workers")
+async def worker_stats(pool: BoundedPool = Depends(get_heavy_pool)):
+  return {"heavy_pool": pool.stats()}
+
+@router.post("/admin/reload")
+def reload_data(ds: Dataset = Depends(get_dataset), pool: BoundedPool = Depends(get_heavy_pool)):
+  previous = ds.version
+  pool.recycle()  # before reloading: the rescoring it schedules must run on workers that load the new files
+  version = ds.reload()
+  errors = ds.warm()
+  return {"status": "ok" if not errors else "error", "dataset_version": version, "changed": version != previous, "errors": errors}
+
+@router.get("/patients")
+def get_patients(ds: Dataset = Depends(get_dataset)): return ds.patients
+
+def _check_range(start: Optional[date], end: Optional[date]):
+  if start and end and start > end: raise HTTPException(status_code=400, detail="start must not be after end")
+
+def _sample_ids_between(ds: Dataset, start: Optional[date], end: Optional[date], patient_id: Optional[str] = None):
+  _check_range(start, end)
+  return ds.time_index.between(start, end, patient_id)
+
+@router.get("/samples")
+def get_samples(patient_id: Optional[str] = None, start: Optional[date] = None, end: Optional[date] = None, ds: Dataset = Depends(get_dataset)):
+  if start or end:
+    _, ids = _sample_ids_between(ds, start, end, patient_id)
+    return [ds.sample_index[sid] for sid in ids]
   if patient_id:
-    return [s for s in samples if s.get("patient_id") == patient_id]
-  return samples
+    return [s for s in ds.samples if s.get("patient_id") == patient_id]
+  return ds.samples
 
-@app.get("/bins")
-def get_bins(sample_id: Optional[str] = None):
-  if sample_id:
-    return [b for b in bins if b.get("sample_id") == sample_id]
-  return bins
+@router.get("/samples/{sample_id}/abundance")
+def sample_abundance(sample_id: str, ds: Dataset = Depends(get_dataset)):
+  sample_bins = ds.bins_by_sample.get(sample_id, [])
+  if not sample_bins and sample_id not in ds.sample_index: raise HTTPException(status_code=404, detail="sample not found")
+  rows = [{"bin_id": b.get("bin_id"), "taxonomy": b.get("taxonomy"), "abundance": float(b.get("abundance") or 0.0)} for b in sample_bins]
+  return {"sample_id": sample_id, "bins": rows, "total_abundance": round(sum(r["abundance"] for r in rows), 6)}
+
+ABUNDANCE_FIELDS = "^(cohort|condition)$"
+
+def _check_labels(patients: List[Dict[str, Any]], field: str, *values: str):
+  """400 unless every value occurs as a patient's ``field``: the job cache is bounded by the data, not by callers."""
+  observed = {p.get(field) for p in patients}
+  unknown = [v for v in values if v not in observed]
+  if unknown: raise HTTPException(status_code=400, detail=f"unknown {field} value(s): {', '.join(unknown)}")
+
+@router.get("/abundance/matrix")
+async def abundance_matrix(ds: Dataset = Depends(get_dataset), pool: BoundedPool = Depends(get_heavy_pool)):
+  """Every sample's taxon abundances in one payload (replaces per-sample /samples/{id}/abundance loops)."""
+  return {"dataset_version": ds.version, **await pool.run(tasks.abundance_matrix, str(ds.data_dir))}
+
+@router.get("/abundance/cohorts")
+async def abundance_cohorts(field: str = Query("cohort", pattern=ABUNDANCE_FIELDS), ds: Dataset = Depends(get_dataset)):
+  res = await job_result_async(ds.job(f"abundance_cohorts:{field}", partial(index_call, str(ds.data_dir), "abundance_matrix", "cohort_summary", field)))
+  if res is None: return job_pending(ds)
+  return {"dataset_version": ds.version, "field": field, "groups": res}
+
+@router.get("/abundance/differential")
+async def abundance_differential(field: str = Query("cohort", pattern=ABUNDANCE_FIELDS), case: str = "Case", control: str = "Control",
+                                 ds: Dataset = Depends(get_dataset)):
+  _check_labels(await off_loop(ds, "patients"), field, case, control)
+  res = await job_result_async(ds.job(f"abundance_differential:{field}:{case}:{control}", partial(tasks.abundance_differential, str(ds.data_dir), field, case, control)))
+  if res is None: return job_pending(ds)
+  return {"dataset_version": ds.version, "field": field, "case": case, "control": control, "unit": "patient", **res}
+
+@router.get("/bins")
+def get_bins(sample_id: Optional[str] = None, start: Optional[date] = None, end: Optional[date] = None, ds: Dataset = Depends(get_dataset)):
+  if not (sample_id or start or end):
+    return ds.bins
+  ids = _sample_ids_between(ds, start, end)[1] if (start or end) else [sample_id]
+  if sample_id and (start or end):
+    ids = [sample_id] if sample_id in set(ids) else []
+  return [b for sid in ids for b in ds.bins_by_sample.get(sid, [])]
+
+@router.get("/patients/{patient_id}/trajectory")
+async def patient_trajectory(patient_id: str, start: Optional[date] = None, end: Optional[date] = None,
+                             taxon: Optional[List[str]] = Query(None), pathway: Optional[List[str]] = Query(None),
+                             ds: Dataset = Depends(get_dataset), pool: BoundedPool = Depends(get_heavy_pool)):
+  if patient_id not in await off_loop(ds, "patient_index"): raise HTTPException(status_code=404, detail="patient not found")
+  _check_range(start, end)
+  return (await pool.run(tasks.trajectories, str(ds.data_dir), [patient_id], start, end, taxon, pathway))[0]
 
-@app.get("/isolates")
-def get_isolates(sample_id: Optional[str] = None, bin_id: Optional[str] = None):
-  data = isolates
+@router.get("/trajectories")
+async def cohort_trajectories(start: Optional[date] = None, end: Optional[date] = None,
+                              taxon: Optional[List[str]] = Query(None), pathway: Optional[List[str]] = Query(None),
+                              ds: Dataset = Depends(get_dataset), pool: BoundedPool = Depends(get_heavy_pool)):
+  """Per-patient trajectories for every patient with samples between start and end."""
+  _check_range(start, end)
+  return await pool.run(tasks.trajectories, str(ds.data_dir), None, start, end, taxon, pathway)
+
+@router.get("/bins/{bin_id}/pathways")
+async def bin_pathways(bin_id: str, ds: Dataset = Depends(get_dataset)):
+  b = (await off_loop(ds, "bin_index")).get(bin_id)
+  if not b: raise HTTPException(status_code=404, detail="bin not found")
+  scored = b.get("pathways_scored") or [{"pathway": p, "score": None, "evidence": None} for p in b.get("pathways") or []]
+  return {"bin_id": bin_id, "pathways": scored}
+
+@router.get("/pathways")
+async def get_pathways(ds: Dataset = Depends(get_dataset), pool: BoundedPool = Depends(get_heavy_pool)):
+  return await pool.run(tasks.pathway_counts, str(ds.data_dir))
+
+@router.get("/pathways/bins")
+async def query_pathway_bins(pathway: List[str] = Query(..., description="Repeat for several pathways"),
+                             min_score: float = 0.0, mode: str = Query("all", pattern="^(all|any)$"),
+                             ds: Dataset = Depends(get_dataset), pool: BoundedPool = Depends(get_heavy_pool)):
+  return await pool.run(tasks.pathway_bins, str(ds.data_dir), pathway, min_score, mode)
+
+@router.get("/pathways/coverage")
+async def pathway_coverage(by: str = "patient", pathway: Optional[List[str]] = Query(None),
+                           ds: Dataset = Depends(get_dataset), pool: BoundedPool = Depends(get_heavy_pool)):
+  return await pool.run(tasks.pathway_coverage, str(ds.data_dir), by, pathway)
+
+@router.get("/pathways/enrichment")
+async def pathway_enrichment(field: str = Query("cohort", pattern=ABUNDANCE_FIELDS), case: str = "Case", control: str = "Control",
+                             pathway: Optional[List[str]] = Query(None),
+                             ds: Dataset = Depends(get_dataset), pool: BoundedPool = Depends(get_heavy_pool)):
+  _check_labels(await off_loop(ds, "patients"), field, case, control)
+  return await pool.run(tasks.pathway_enrichment, str(ds.data_dir), field, case, control, pathway)
+
+@router.get("/isolates")
+def get_isolates(sample_id: Optional[str] = None, bin_id: Optional[str] = None, ds: Dataset = Depends(get_dataset)):
+  data = ds.isolates
   if sample_id:
     data = [i for i in data if i.get("source_sample") == sample_id or i.get("sample_id") == sample_id]
   if bin_id:
     data = [i for i in data if i.get("bin_id") == bin_id]
   return data
 
-@app.get("/isolates/{isolate_id}")
-def get_isolate(isolate_id: str):
-  it = ISOLATE_INDEX.get(isolate_id)
+@router.get("/isolates/{isolate_id}")
+async def get_isolate(isolate_id: str, ds: Dataset = Depends(get_dataset)):
+  it = (await off_loop(ds, "isolate_index")).get(isolate_id)
   if not it: raise HTTPException(status_code=404, detail="isolate not found")
   return it
 
-@app.get("/prebiotics")
-def get_prebiotics(): return prebiotics
-
-@app.get("/network")
-def get_network(isolate_id: Optional[str] = None, type: Optional[str] = Query(None), max_neighbors: int = 80):
-  edges = interactions
-  if type:
-    edges = [e for e in edges if e.get("type") == type]
-  if isolate_id:
-    edges = [e for e in edges if e.get("source_isolate") == isolate_id or e.get("target_isolate") == isolate_id]
-  edges = edges[:max_neighbors]
-  ids = set()
-  for e in edges:
-    ids.add(e.get("source_isolate")); ids.add(e.get("target_isolate"))
-  nodes = [{"id": nid, "label": ISOLATE_INDEX.get(nid, {}).get("taxid_genus", nid)} for nid in ids if nid]
-  edgelist = [{"source": e.get("source_isolate"), "target": e.get("target_isolate"), "type": e.get("type"), "score": e.get("score", 0.0)} for e in edges]
-  return {"nodes": nodes, "edges": edgelist}
+@router.get("/isolates/{isolate_id}/similar")
+async def get_similar_isolates(isolate_id: str, k: int = Query(10, ge=1, le=200), min_jaccard: float = Query(0.0, ge=0.0, le=1.0),
+                               ds: Dataset = Depends(get_dataset)):
+  if isolate_id not in await off_loop(ds, "isolate_index"): raise HTTPException(status_code=404, detail="isolate not found")
+  index = await job_result_async(ds.similarity_job())
+  if index is None: return job_pending(ds)
+  hits = index.query(isolate_id, k=k, min_jaccard=min_jaccard) or []
+  return {"dataset_version": ds.version, "isolate_id": isolate_id, "k": k,
+          "similar": [{"isolate_id": h.pop("id"), **h} for h in hits]}
+
+@router.get("/prebiotics")
+def get_prebiotics(ds: Dataset = Depends(get_dataset)): return ds.prebiotics
+
+def _analytics_for_type(res: Dict[str, Any], type: Optional[str]) -> Dict[str, Any]:
+  t = type or ALL_TYPES
+  if t not in res["by_type"]:
+    raise HTTPException(status_code=404, detail=f"no interactions of type '{t}'")
+  return res["by_type"][t]
+
+@router.get("/analytics/graph")
+async def get_graph_analytics(type: Optional[str] = Query(None, description="Interaction type; omit for the whole network"),
+                              ds: Dataset = Depends(get_dataset)):
+  res = await job_result_async(ds.graph_analytics_job())
+  if res is None: return job_pending(ds)
+  return {"dataset_version": ds.version, "type": type or ALL_TYPES, "types": res["types"], **_analytics_for_type(res, type)}
+
+@router.get("/analytics/graph/keystones")
+async def get_graph_keystones(type: Optional[str] = Query(None), metric: str = "pagerank", k: int = Query(10, ge=1, le=500),
+                              ds: Dataset = Depends(get_dataset)):
+  if metric not in {"pagerank", "weighted_degree", "degree", "degree_centrality", "in_degree", "out_degree"}:
+    raise HTTPException(status_code=400, detail=f"unknown metric '{metric}'")
+  res = await job_result_async(ds.graph_analytics_job())
+  if res is None: return job_pending(ds)
+  return {"dataset_version": ds.version, "type": type or ALL_TYPES, "metric": metric, "isolates": top_nodes(_analytics_for_type(res, type), metric, k)}
+
+@router.get("/analytics/graph/isolates/{isolate_id}")
+async def get_isolate_graph_analytics(isolate_id: str, ds: Dataset = Depends(get_dataset)):
+  res = await job_result_async(ds.graph_analytics_job())
+  if res is None: return job_pending(ds)
+  by_type = {t: r["nodes"][isolate_id] for t, r in res["by_type"].items() if isolate_id in r["nodes"]}
+  if not by_type: raise HTTPException(status_code=404, detail="isolate not found")
+  return {"dataset_version": ds.version, "isolate_id": isolate_id, "by_type": by_type}
+
+@router.get("/network")
+async def get_network(isolate_id: Optional[str] = None, type: Optional[str] = Query(None), max_neighbors: int = 80, analytics: bool = False,
+                      ds: Dataset = Depends(get_dataset), pool: BoundedPool = Depends(get_heavy_pool)):
+  nodes, edgelist = await pool.run(tasks.build_network, str(ds.data_dir), isolate_id, type, max_neighbors)
+  if not analytics:
+    return {"nodes": nodes, "edges": edgelist}
+  # Node attributes come from the precomputed analytics; never block the network on them.
+  res = job_result(ds.graph_analytics_job(), wait=0.0)
+  if res is None:
+    return {"nodes": nodes, "edges": edgelist, "analytics": {"status": "computing", "dataset_version": ds.version}}
+  metrics = res["by_type"].get(type or ALL_TYPES, {"nodes": {}})["nodes"]
+  for n in nodes:
+    n.update(metrics.get(n["id"], {}))
+  return {"nodes": nodes, "edges": edgelist, "analytics": {"status": "ready", "dataset_version": ds.version, "type": type or ALL_TYPES}}
 
 class FormPreviewIn(BaseModel):
   organisms: List[str]
   prebiotics: Optional[List[str]] = []
 
-def _score_breakdown(organisms: List[str]):
-  chosen = set(organisms or [])
-  comp_sum = 0.0
-  inhib_sum = 0.0
-  compo_sum = 0.0
-  comp_list = []
-  inhib_list = []
-  comp_count = inhib_count = compo_count = 0
-
-  for e in interactions:
-    a = e.get("source_isolate"); b = e.get("target_isolate")
-    if a in chosen and b in chosen:
-      t = e.get("type"); s = float(e.get("score", 0.5))
-      if t == "complementarity":
-        comp_sum += s; comp_count += 1; comp_list.append(e)
-      elif t == "inhibition":
-        inhib_sum += s; inhib_count += 1; inhib_list.append(e)
-      elif t == "competition":
-        compo_sum += s; compo_count += 1; inhib_list.append({"type":"competition", **e})
-
-  score = 0.1 + 0.2 * comp_sum - 0.3 * (inhib_sum + 0.5 * compo_sum)
-  if inhib_count:
-    score -= 0.12 * (inhib_sum / max(1, inhib_count))
-  score = max(0.0, min(1.0, score))
-
-  return {
-    "organisms": list(chosen),
-    "sum_complementarity": round(comp_sum, 3),
-    "sum_inhibition": round(inhib_sum, 3),
-    "sum_competition": round(compo_sum, 3),
-    "avg_inhibition": round(inhib_sum/max(1,inhib_count), 3) if inhib_count else 0.0,
-    "counts": {"complementarity": comp_count, "inhibition": inhib_count, "competition": compo_count},
-    "edges_included": {"complementarity": comp_list, "inhibition_or_competition": inhib_list},
-    "score_predicted": round(score, 2),
-  }
-
-@app.post("/formulations/preview")
-def preview_formulation(payload: FormPreviewIn, debug: Optional[int] = 0):
-  bd = _score_breakdown(payload.organisms)
-  notes = []
-  if bd["sum_complementarity"]:
-    notes.append("Complementarity present")
-  if bd["sum_inhibition"] or bd["sum_competition"]:
-    notes.append("Internal negative interactions (inhibition/competition)")
-  if payload.prebiotics:
-    notes.append(f"Prebiotics: {', '.join(payload.prebiotics)}")
-  if debug:
-    bd["notes"] = notes or ["No notable interactions"]
-    return bd
-  return {"score_predicted": bd["score_predicted"], "notes": notes or ["No notable interactions"]}
+@router.post("/formulations/preview")
+async def preview_formulation(payload: FormPreviewIn, debug: Optional[int] = 0, uncertainty: bool = False,
+                              draws: int = Query(10_000, ge=100, le=200_000), threshold: float = 0.5, seed: Optional[int] = None,
+                              ds: Dataset = Depends(get_dataset), pool: BoundedPool = Depends(get_heavy_pool)):
+  return await pool.run(tasks.preview, str(ds.data_dir), payload.organisms, payload.prebiotics or [], bool(debug), uncertainty, draws, threshold, seed)
+
+# One batch fans out over every worker, so its size is capped to keep it within the pool's timeout.
+BATCH_MAX_ITEMS = 100
+
+class FormBatchIn(BaseModel):
+  items: List[FormPreviewIn] = Field(..., max_length=BATCH_MAX_ITEMS)
+
+@router.post("/formulations/preview/batch")
+async def preview_formulation_batch(payload: FormBatchIn, draws: int = Query(10_000, ge=100, le=200_000),
+                                    threshold: float = 0.5, seed: Optional[int] = None,
+                                    ds: Dataset = Depends(get_dataset), pool: BoundedPool = Depends(get_heavy_pool)):
+  """Point scores plus Monte Carlo distributions for many mixes; one pool job per worker-sized chunk."""
+  work = [(it.organisms, None if seed is None else seed + i) for i, it in enumerate(payload.items)]
+  size = max(1, math.ceil(len(work) / pool.max_workers))
+  chunks = [work[i:i + size] for i in range(0, len(work), size)]
+  results = await asyncio.gather(*(pool.run(tasks.preview_chunk, str(ds.data_dir), c, draws, threshold) for c in chunks))
+  return [r for chunk in results for r in chunk]
+
+class FormulationIn(BaseModel):
+  formulation_id: Optional[str] = None
+  organisms: List[str]
+  prebiotics: Optional[List[str]] = []
+  notes: Optional[str] = None
+
+# The store is always fetched off the loop: creating it loads data, and reload() holds its lock while loading.
+@router.get("/formulations")
+async def list_formulations(ds: Dataset = Depends(get_dataset)):
+  store = await off_loop(ds, "formulation_store")
+  await scores_landed(store)
+  return store.list_all()
+
+@router.get("/formulations/{formulation_id}")
+async def get_formulation(formulation_id: str, ds: Dataset = Depends(get_dataset)):
+  store = await off_loop(ds, "formulation_store")
+  await scores_landed(store, [formulation_id])
+  f = store.get(formulation_id)
+  if not f: raise HTTPException(status_code=404, detail="formulation not found")
+  return f
+
+@router.post("/formulations")
+async def save_formulation(payload: FormulationIn, ds: Dataset = Depends(get_dataset)):
+  isolate_index = await off_loop(ds, "isolate_index")
+  unknown = [o for o in payload.organisms if o not in isolate_index]
+  if unknown: raise HTTPException(status_code=400, detail=f"unknown isolate(s): {', '.join(unknown)}")
+  store = await off_loop(ds, "formulation_store")
+  fid = await run_in_threadpool(store.save, payload.model_dump(), ds.score_fn(), ds.version)  # writes the store file
+  await scores_landed(store, [fid])
+  return store.get(fid)
+
+ALLOWED_ORIGINS = [
+  "http://127.0.0.1:5174", "http://localhost:5174",
+  "http://127.0.0.1:5173", "http://localhost:5173",
+  "http://127.0.0.1:3000", "http://localhost:3000",
+]
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+  ds: Dataset = app.state.dataset
+  print(f"[ASMA] REPO_ROOT = {REPO_ROOT}")
+  print(f"[ASMA] DATA_DIR  = {ds.data_dir}")
+  if not ds.data_dir.exists():
+    print(f"[ASMA] WARNING: demo data folder not found: {ds.data_dir}. Set ASMA_DATA_DIR or DEMO_DATA_DIR.")
+  # Serve /health straight away; /ready flips once the core entities are loaded (interactions stay lazy).
+  app.state.warmup = asyncio.get_running_loop().run_in_executor(None, ds.warm)
+  yield
+  # Stop worker processes with the server so none outlive it.
+  app.state.heavy_pool.shutdown()
+
+def dataset_unavailable(_request: Request, exc: DatasetError):
+  return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+def create_app(data_dir: Optional[Path] = None, formulations_path: Optional[Path] = None) -> FastAPI:
+  """Build the API. Cheap: no data file is read here; see Dataset for what loads when."""
+  data_dir = Path(data_dir).resolve() if data_dir else resolve_data_dir()
+  formulations_path = formulations_path or os.getenv("ASMA_FORMULATIONS_PATH") or DEFAULT_FORMULATIONS_PATH
+  app = FastAPI(title="ASMA Demo API", version="0.3.2", lifespan=lifespan)
+  # CPU-heavy work (scoring, network layout, simulations, matrix analytics and the cached background
+  # jobs): bounded process pool, so none of it competes with the event loop for the GIL.
+  pool = app.state.heavy_pool = BoundedPool(
+    # Leave a core for the event loop so point lookups are not starved by heavy work.
+    max_workers=int(os.getenv("ASMA_HEAVY_WORKERS", str(max(1, min(4, (os.cpu_count() or 2) - 1))))),
+    max_pending=int(os.getenv("ASMA_HEAVY_MAX_PENDING", "16")),
+    timeout=float(os.getenv("ASMA_HEAVY_TIMEOUT_S", "30")),
+    initializer=init_worker,
+    initargs=(str(data_dir),),
+  )
+  # Not register()ed: pool tasks run in the worker processes, each on the dataset its init_worker loaded.
+  app.state.dataset = Dataset(data_dir, pool, Path(formulations_path).resolve())
+  app.add_middleware(
+    CORSMiddleware,
+    allow_origins=ALLOWED_ORIGINS,
+    allow_credentials=False,
+    allow_methods=["*"],
+    allow_headers=["*"],
+  )
+  app.add_exception_handler(DatasetError, dataset_unavailable)
+  app.include_router(router)
+  return app
+
+app = create_app()
@@ -0,0 +1,109 @@
+"""Sparse bins x pathways score matrix and the queries built on it.
+
+The matrix is assembled once per dataset load from ``pathways_scored``; bins
+that only carry a plain ``pathways`` list contribute presence (score 1.0).
+Threshold queries and abundance-weighted coverage are sparse matrix products /
+column reductions, never per-bin Python loops; case/control enrichment over the
+coverage matrix lives in :mod:`.stats`.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from scipy import sparse
+
+PRESENCE_SCORE = 1.0
+
+
+@dataclass
+class PathwayMatrix:
+    bin_ids: List[str]
+    pathways: List[str]
+    scores: sparse.csr_matrix  # bins x pathways
+    abundance: np.ndarray  # per bin
+    sample_ids: List[Optional[str]]
+    pathway_index: Dict[str, int] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.pathway_index = {p: j for j, p in enumerate(self.pathways)}
+
+    def columns(self, pathways: Optional[Sequence[str]]) -> List[int]:
+        """Column indices for ``pathways`` (all columns when None); unknown names raise KeyError."""
+        if not pathways:
+            return list(range(len(self.pathways)))
+        return [self.pathway_index[p] for p in pathways]
+
+    def bins_matching(self, pathways: Sequence[str], min_score: float = 0.0, mode: str = "all") -> List[Dict[str, Any]]:
+        """Bins whose score is >= ``min_score`` for all (or any) of ``pathways``."""
+        cols = self.columns(pathways)
+        sub = self.scores[:, cols].toarray()
+        hit = (sub >= min_score) & (sub > 0)
+        mask = hit.all(axis=1) if mode == "all" else hit.any(axis=1)
+        rows = np.flatnonzero(mask)
+        order = rows[np.argsort(-sub[rows].max(axis=1), kind="stable")]
+        return [
+            {
+                "bin_id": self.bin_ids[i],
+                "sample_id": self.sample_ids[i],
+                "abundance": float(self.abundance[i]),
+                "scores": {self.pathways[c]: float(sub[i, k]) for k, c in enumerate(cols) if sub[i, k] > 0},
+            }
+            for i in order
+        ]
+
+    def group_matrix(self, group_of_bin: Sequence[Optional[str]]):
+        """(group ids, groups x bins sparse matrix weighted by bin abundance)."""
+        groups = sorted({g for g in group_of_bin if g is not None})
+        gidx = {g: k for k, g in enumerate(groups)}
+        rows = np.array([gidx[g] for g in group_of_bin if g is not None], dtype=np.int64)
+        cols = np.array([i for i, g in enumerate(group_of_bin) if g is not None], dtype=np.int64)
+        weights = self.abundance[cols]
+        gm = sparse.csr_matrix((weights, (rows, cols)), shape=(len(groups), len(self.bin_ids)))
+        return groups, gm
+
+    def coverage(self, group_of_bin: Sequence[Optional[str]], pathways: Optional[Sequence[str]] = None,
+                 per_sample: bool = False):
+        """Abundance-weighted pathway coverage per group: sum_b abundance_b * score_bp.
+
+        With ``per_sample`` each group's sum is divided by its number of samples, so a patient
+        sampled twice is not counted twice (as in ``AbundanceMatrix.by_patient``).
+        """
+        groups, gm = self.group_matrix(group_of_bin)
+        cols = self.columns(pathways)
+        cov = (gm @ self.scores[:, cols]).toarray()
+        if per_sample:
+            samples: Dict[str, set] = {}
+            for g, sid in zip(group_of_bin, self.sample_ids):
+                if g is not None:
+                    samples.setdefault(g, set()).add(sid)
+            cov /= np.array([len(samples[g]) for g in groups], dtype=np.float64)[:, None]
+        return groups, [self.pathways[c] for c in cols], cov
+
+
+def build_pathway_matrix(bins: Sequence[Dict[str, Any]]) -> PathwayMatrix:
+    per_bin: List[Dict[str, float]] = []
+    for b in bins:
+        scored = b.get("pathways_scored")
+        entries = (
+            [(p.get("pathway"), p.get("score")) for p in scored]
+            if scored
+            else [(p, PRESENCE_SCORE) for p in b.get("pathways") or []]
+        )
+        row: Dict[str, float] = {}
+        for name, score in entries:
+            if name:
+                val = PRESENCE_SCORE if score is None else float(score)
+                row[name] = max(val, row.get(name, 0.0))
+        per_bin.append(row)
+    names = sorted({p for row in per_bin for p in row})
+    col = {p: j for j, p in enumerate(names)}
+    rows = np.fromiter((i for i, row in enumerate(per_bin) for _ in row), dtype=np.int64)
+    cols = np.fromiter((col[p] for row in per_bin for p in row), dtype=np.int64)
+    vals = np.fromiter((v for row in per_bin for v in row.values()), dtype=np.float64)
+    return PathwayMatrix(
+        bin_ids=[b.get("bin_id") for b in bins],
+        pathways=names,
+        scores=sparse.csr_matrix((vals, (rows, cols)), shape=(len(bins), len(names))),
+        abundance=np.asarray([float(b.get("abundance") or 0.0) for b in bins], dtype=np.float64),
+        sample_ids=[b.get("sample_id") for b in bins],
+    )
@@ -0,0 +1,117 @@
+"""MinHash/LSH index over isolate functional profiles.
+
+Each isolate is reduced to a set of prefixed feature tokens (pathways of its
+linked bins, metabolite markers, AMR flags, linked bins). MinHash signatures
+are computed for all isolates in one NumPy pass; banded LSH buckets then give
+candidate neighbours without comparing against the whole library.
+"""
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+import numpy as np
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def _token_hash(token: str) -> int:
+    # Stable across processes (unlike hash()), so signatures are reproducible.
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+def isolate_features(isolate: Dict[str, Any], bin_index: Dict[str, Dict[str, Any]]) -> Set[str]:
+    """Feature tokens for one isolate; pathways come from its linked bins."""
+    feats: Set[str] = set()
+    for b in isolate.get("linked_bins") or []:
+        feats.add(f"bin:{b}")
+        for p in (bin_index.get(b) or {}).get("pathways") or []:
+            feats.add(f"pathway:{p}")
+    for p in isolate.get("pathways") or []:
+        feats.add(f"pathway:{p}")
+    for m in isolate.get("metabolite_markers") or []:
+        feats.add(f"marker:{m}")
+    for a in isolate.get("amr_flags") or []:
+        feats.add(f"amr:{a}")
+    return feats
+
+
+class MinHashLSH:
+    """Banded MinHash LSH; ``num_perm`` must equal ``bands * rows``."""
+
+    def __init__(self, bands: int = 32, rows: int = 4, seed: int = 1):
+        self.bands, self.rows = bands, rows
+        self.num_perm = bands * rows
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_MERSENNE_PRIME), size=self.num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_MERSENNE_PRIME), size=self.num_perm, dtype=np.uint64)
+        self.ids: List[str] = []
+        self.features: List[Set[str]] = []
+        self.signatures = np.zeros((0, self.num_perm), dtype=np.uint64)
+        self._position: Dict[str, int] = {}
+        self._buckets: List[Dict[bytes, List[int]]] = [dict() for _ in range(bands)]
+
+    def signature(self, features: Iterable[str]) -> np.ndarray:
+        hv = np.fromiter((_token_hash(t) for t in features), dtype=np.uint64)
+        if hv.size == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        # (a*x + b) mod p, truncated to 32 bits; uint64 wrap-around is intended.
+        with np.errstate(over="ignore"):
+            phv = ((np.outer(hv, self._a) + self._b) % _MERSENNE_PRIME) & _MAX_HASH
+        return phv.min(axis=0)
+
+    def build(self, items: Dict[str, Set[str]]) -> "MinHashLSH":
+        self.ids = list(items)
+        self.features = [items[k] for k in self.ids]
+        self._position = {k: i for i, k in enumerate(self.ids)}
+        self.signatures = (
+            np.vstack([self.signature(f) for f in self.features])
+            if self.ids
+            else np.zeros((0, self.num_perm), dtype=np.uint64)
+        )
+        self._buckets = [dict() for _ in range(self.bands)]
+        for i, feats in enumerate(self.features):
+            if feats:
+                for band, key in enumerate(self._band_keys(self.signatures[i])):
+                    self._buckets[band].setdefault(key, []).append(i)
+        return self
+
+    def _band_keys(self, sig: np.ndarray) -> List[bytes]:
+        return [sig[b * self.rows:(b + 1) * self.rows].tobytes() for b in range(self.bands)]
+
+    def candidates(self, sig: np.ndarray) -> Set[int]:
+        found: Set[int] = set()
+        for band, key in enumerate(self._band_keys(sig)):
+            found.update(self._buckets[band].get(key, ()))
+        return found
+
+    def query(self, item_id: str, k: int = 10, min_jaccard: float = 0.0) -> Optional[List[Dict[str, Any]]]:
+        """Approximate top-``k`` neighbours of an indexed item; None if it is unknown."""
+        pos = self._position.get(item_id)
+        if pos is None:
+            return None
+        if not self.features[pos]:
+            return []
+        sig = self.signatures[pos]
+        cand = np.fromiter((c for c in self.candidates(sig) if c != pos), dtype=np.int64)
+        if cand.size == 0:
+            return []
+        est = (self.signatures[cand] == sig).mean(axis=1)
+        keep = est >= min_jaccard
+        cand, est = cand[keep], est[keep]
+        order = np.lexsort((cand, -est))[:k]
+        return [
+            {
+                "id": self.ids[c],
+                "jaccard_estimate": round(float(est[j]), 4),
+                "shared_features": sorted(self.features[pos] & self.features[c]),
+            }
+            for j, c in ((j, int(cand[j])) for j in order)
+        ]
+
+
+def build_isolate_index(
+    isolates: Sequence[Dict[str, Any]], bins: Sequence[Dict[str, Any]], bands: int = 32, rows: int = 4
+) -> MinHashLSH:
+    bin_index = {b.get("bin_id"): b for b in bins}
+    items = {i.get("isolate_id"): isolate_features(i, bin_index) for i in isolates if i.get("isolate_id")}
+    return MinHashLSH(bands=bands, rows=rows).build(items)
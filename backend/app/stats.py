@@ -0,0 +1,39 @@
+"""Vectorized case-vs-control statistics over a groups x features matrix."""
+from typing import Any, Dict, List
+
+import numpy as np
+
+
+def case_control(matrix: np.ndarray, features: List[str], is_case: np.ndarray, is_control: np.ndarray,
+                 key: str = "feature", pseudocount: float = 1e-3) -> List[Dict[str, Any]]:
+    """Per-column comparison of the ``is_case`` rows against the ``is_control`` rows.
+
+    Reports group means, prevalence, log2 fold change and Welch's t statistic
+    (None when either arm has fewer than two members). Sorted by |log2 FC|.
+    """
+    case, ctrl = matrix[is_case], matrix[is_control]
+    n1, n2 = case.shape[0], ctrl.shape[0]
+    width = matrix.shape[1]
+    m1 = case.mean(axis=0) if n1 else np.zeros(width)
+    m2 = ctrl.mean(axis=0) if n2 else np.zeros(width)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        v1 = case.var(axis=0, ddof=1) if n1 > 1 else np.full(width, np.nan)
+        v2 = ctrl.var(axis=0, ddof=1) if n2 > 1 else np.full(width, np.nan)
+        t = (m1 - m2) / np.sqrt(v1 / max(n1, 1) + v2 / max(n2, 1))
+    lfc = np.log2((m1 + pseudocount) / (m2 + pseudocount))
+    prev1 = (case > 0).mean(axis=0) if n1 else np.zeros(width)
+    prev2 = (ctrl > 0).mean(axis=0) if n2 else np.zeros(width)
+    out = [
+        {
+            key: f,
+            "mean_case": round(float(m1[j]), 6),
+            "mean_control": round(float(m2[j]), 6),
+            "prevalence_case": round(float(prev1[j]), 4),
+            "prevalence_control": round(float(prev2[j]), 4),
+            "log2_fold_change": round(float(lfc[j]), 4),
+            "welch_t": None if not np.isfinite(t[j]) else round(float(t[j]), 4),
+        }
+        for j, f in enumerate(features)
+    ]
+    out.sort(key=lambda r: -abs(r["log2_fold_change"]))
+    return out
@@ -0,0 +1,154 @@
+"""Endpoint work that runs on the heavy worker pool.
+
+Each function takes the data dir rather than a Dataset and reads the worker's
+own :func:`~.dataset.worker_dataset`, so it pickles as a plain reference to
+this module. Workers import this module, never ``main``: unpickling a task must
+not build the app, and ``main`` imports it for the references alone, so the
+numpy/scipy-backed helpers are imported inside the tasks. Client errors are
+raised as :class:`~.workers.TaskError`.
+"""
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from .dataset import Dataset, worker_dataset
+from .formulations import score_breakdown
+from .workers import TaskError
+
+
+# ---- abundance / trajectories ----
+def abundance_matrix(data_dir: str) -> Dict[str, Any]:
+    return worker_dataset(data_dir).abundance_matrix.to_dict()
+
+
+def abundance_differential(data_dir: str, field: str, case: str, control: str) -> Dict[str, Any]:
+    am = worker_dataset(data_dir).abundance_matrix
+    labels = list(am.patient_labels(field).values())
+    return {"n_case": labels.count(case), "n_control": labels.count(control), "taxa": am.differential(field, case, control)}
+
+
+def trajectories(data_dir: str, patient_ids: Optional[List[str]], start: Optional[date], end: Optional[date],
+                 taxon: Optional[List[str]], pathway: Optional[List[str]]) -> List[Dict[str, Any]]:
+    """Trajectories for ``patient_ids`` (None: every patient with samples between start and end)."""
+    from .timeline import trajectory
+
+    ds = worker_dataset(data_dir)
+    taxa, pws = set(taxon or []), set(pathway or [])
+    am = ds.abundance_matrix
+    tcols = [j for j, t in enumerate(am.taxa) if not taxa or t in taxa]
+    cov_ids, cov_names, cov = ds.sample_coverage
+    pcols = [j for j, p in enumerate(cov_names) if not pws or p in pws]
+    out = []
+    for pid in sorted(ds.time_index.by_patient) if patient_ids is None else patient_ids:
+        dates, ids = ds.time_index.between(start, end, pid)
+        if patient_ids is None and not len(ids):
+            continue
+        out.append({
+            "patient_id": pid,
+            "dates": [str(d) for d in dates],
+            "sample_ids": list(ids),
+            "taxa": trajectory(ids, am.sample_ids, am.values, [am.taxa[j] for j in tcols], tcols),
+            "pathways": trajectory(ids, cov_ids, cov, [cov_names[j] for j in pcols], pcols),
+        })
+    return out
+
+
+# ---- pathways ----
+def _pathway_columns(ds: Dataset, pathway: Optional[List[str]]) -> Optional[List[str]]:
+    unknown = [p for p in pathway or [] if p not in ds.pathway_matrix.pathway_index]
+    if unknown:
+        raise TaskError(404, f"unknown pathway(s): {', '.join(unknown)}")
+    return pathway or None
+
+
+def _bin_groups(ds: Dataset, by: str) -> List[Optional[str]]:
+    if by == "sample":
+        return list(ds.pathway_matrix.sample_ids)
+    if by == "patient":
+        return [ds.sample_index.get(sid, {}).get("patient_id") for sid in ds.pathway_matrix.sample_ids]
+    raise TaskError(400, "by must be 'sample' or 'patient'")
+
+
+def pathway_counts(data_dir: str) -> List[Dict[str, Any]]:
+    pm = worker_dataset(data_dir).pathway_matrix
+    counts = pm.scores.getnnz(axis=0)
+    return [{"pathway": p, "bin_count": int(c)} for p, c in zip(pm.pathways, counts)]
+
+
+def pathway_bins(data_dir: str, pathway: List[str], min_score: float, mode: str) -> Dict[str, Any]:
+    ds = worker_dataset(data_dir)
+    cols = _pathway_columns(ds, pathway)
+    return {"pathways": cols, "min_score": min_score, "mode": mode, "bins": ds.pathway_matrix.bins_matching(cols, min_score, mode)}
+
+
+def pathway_coverage(data_dir: str, by: str, pathway: Optional[List[str]]) -> Dict[str, Any]:
+    ds = worker_dataset(data_dir)
+    groups, names, cov = ds.pathway_matrix.coverage(_bin_groups(ds, by), _pathway_columns(ds, pathway))
+    return {"by": by, "pathways": names,
+            "coverage": [{f"{by}_id": g, "pathways": {p: round(float(v), 6) for p, v in zip(names, row)}} for g, row in zip(groups, cov)]}
+
+
+def pathway_enrichment(data_dir: str, field: str, case: str, control: str, pathway: Optional[List[str]]) -> Dict[str, Any]:
+    import numpy as np
+
+    from .stats import case_control
+
+    ds = worker_dataset(data_dir)
+    # Patients are the unit: mean coverage over each patient's samples, as for differential abundance.
+    groups, names, cov = ds.pathway_matrix.coverage(_bin_groups(ds, "patient"), _pathway_columns(ds, pathway), per_sample=True)
+    labels = [ds.patient_index.get(g, {}).get(field) for g in groups]
+    is_case = [lbl == case for lbl in labels]
+    is_control = [lbl == control for lbl in labels]
+    return {"field": field, "case": case, "control": control, "n_case": sum(is_case), "n_control": sum(is_control),
+            "pathways": case_control(cov, names, np.array(is_case, dtype=bool), np.array(is_control, dtype=bool), key="pathway")}
+
+
+# ---- network / formulation previews ----
+def build_network(data_dir: str, isolate_id: Optional[str], type: Optional[str], max_neighbors: int):
+    ds = worker_dataset(data_dir)
+    edges = ds.interactions
+    if type:
+        edges = [e for e in edges if e.get("type") == type]
+    if isolate_id:
+        edges = [e for e in edges if e.get("source_isolate") == isolate_id or e.get("target_isolate") == isolate_id]
+    edges = edges[:max_neighbors]
+    ids = set()
+    for e in edges:
+        ids.add(e.get("source_isolate"))
+        ids.add(e.get("target_isolate"))
+    nodes = [{"id": nid, "label": ds.isolate_index.get(nid, {}).get("taxid_genus", nid)} for nid in ids if nid]
+    edgelist = [{"source": e.get("source_isolate"), "target": e.get("target_isolate"), "type": e.get("type"), "score": e.get("score", 0.0)} for e in edges]
+    return nodes, edgelist
+
+
+def preview(data_dir: str, organisms: List[str], prebiotics: List[str], debug: bool, uncertainty: bool,
+            draws: int, threshold: float, seed: Optional[int]) -> Dict[str, Any]:
+    from .uncertainty import simulate, subgraph_arrays
+
+    edges = worker_dataset(data_dir).interactions
+    bd = score_breakdown(organisms, edges)
+    dist = simulate(*subgraph_arrays(organisms, edges), draws=draws, threshold=threshold, seed=seed) if uncertainty else None
+    notes = []
+    if bd["sum_complementarity"]:
+        notes.append("Complementarity present")
+    if bd["sum_inhibition"] or bd["sum_competition"]:
+        notes.append("Internal negative interactions (inhibition/competition)")
+    if prebiotics:
+        notes.append(f"Prebiotics: {', '.join(prebiotics)}")
+    if debug:
+        bd["notes"] = notes or ["No notable interactions"]
+        if dist:
+            bd["score_distribution"] = dist
+        return bd
+    out = {"score_predicted": bd["score_predicted"], "notes": notes or ["No notable interactions"]}
+    if dist:
+        out["score_distribution"] = dist
+    return out
+
+
+def preview_chunk(data_dir: str, chunk: List[Tuple[List[str], Optional[int]]], draws: int, threshold: float) -> List[Dict[str, Any]]:
+    from .uncertainty import simulate, subgraph_arrays
+
+    edges = worker_dataset(data_dir).interactions
+    return [{"organisms": orgs, "score_predicted": score_breakdown(orgs, edges)["score_predicted"],
+             "score_distribution": simulate(*subgraph_arrays(orgs, edges), draws=draws, threshold=threshold, seed=sd)}
+            for orgs, sd in chunk]
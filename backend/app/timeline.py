@@ -0,0 +1,93 @@
+"""Sorted time index over sample ``collection_date``.
+
+Samples are kept sorted by date globally and per patient, so a date-range
+filter is two ``np.searchsorted`` calls instead of a scan. Trajectories align
+the sorted sample ids against the (sorted) row ids of the abundance / pathway
+matrices with another ``searchsorted`` and gather the rows in one shot.
+"""
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+_NAT = np.datetime64("NaT", "D")
+
+
+def parse_date(value: Any) -> np.datetime64:
+    try:
+        return np.datetime64(str(value).strip()[:10], "D")
+    except (TypeError, ValueError):
+        return _NAT
+
+
+@dataclass
+class TimeIndex:
+    dates: np.ndarray  # datetime64[D], ascending
+    sample_ids: np.ndarray  # object, same order as dates
+    by_patient: Dict[str, Tuple[np.ndarray, np.ndarray]] = field(default_factory=dict)
+    undated: List[str] = field(default_factory=list)
+
+    def _slice(self, dates: np.ndarray, ids: np.ndarray, start: Optional[date], end: Optional[date]):
+        lo = 0 if start is None else np.searchsorted(dates, np.datetime64(start, "D"), side="left")
+        hi = len(dates) if end is None else np.searchsorted(dates, np.datetime64(end, "D"), side="right")
+        return dates[lo:hi], ids[lo:hi]
+
+    def between(self, start: Optional[date] = None, end: Optional[date] = None,
+                patient_id: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(dates, sample ids) collected in ``[start, end]``, oldest first; bounds are inclusive."""
+        if patient_id is None:
+            return self._slice(self.dates, self.sample_ids, start, end)
+        dates, ids = self.by_patient.get(patient_id, (self.dates[:0], self.sample_ids[:0]))
+        return self._slice(dates, ids, start, end)
+
+
+def build_time_index(samples: Sequence[Dict[str, Any]]) -> TimeIndex:
+    dates = np.array([parse_date(s.get("collection_date")) for s in samples], dtype="datetime64[D]")
+    ids = np.array([s.get("sample_id") for s in samples], dtype=object)
+    pids = np.array([s.get("patient_id") for s in samples], dtype=object)
+    dated = ~np.isnat(dates)
+    undated = [str(x) for x in ids[~dated]]
+    dates, ids, pids = dates[dated], ids[dated], pids[dated]
+    order = np.argsort(dates, kind="stable")
+    dates, ids, pids = dates[order], ids[order], pids[order]
+    # Stable sort by patient keeps each patient's samples in date order; slice every group's range.
+    has_pid = np.flatnonzero(pids != None)  # noqa: E711 (elementwise on object array)
+    grouped = has_pid[np.argsort(pids[has_pid].astype(str), kind="stable")]
+    gp = pids[grouped]
+    starts = np.flatnonzero(np.r_[True, gp[1:] != gp[:-1]]) if gp.size else np.zeros(0, dtype=np.int64)
+    ends = np.r_[starts[1:], gp.size]
+    by_patient = {gp[a]: (dates[grouped[a:b]], ids[grouped[a:b]]) for a, b in zip(starts, ends)}
+    return TimeIndex(dates=dates, sample_ids=ids, by_patient=by_patient, undated=undated)
+
+
+def align(row_ids: Sequence[str], query: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Positions of ``query`` ids in the sorted ``row_ids`` and a mask of the ones present."""
+    rows = np.asarray(row_ids, dtype=object)
+    if rows.size == 0 or query.size == 0:
+        return np.zeros(query.size, dtype=np.int64), np.zeros(query.size, dtype=bool)
+    pos = np.searchsorted(rows, query)
+    pos = np.minimum(pos, rows.size - 1)
+    return pos, rows[pos] == query
+
+
+def gather(row_ids: Sequence[str], matrix, query: np.ndarray, cols: Optional[Sequence[int]] = None) -> np.ndarray:
+    """Dense rows of ``matrix`` (ndarray or sparse) for each id in ``query``, restricted to ``cols``.
+
+    Only the requested rows are densified; ids without a row give zeros.
+    """
+    cols = np.arange(matrix.shape[1]) if cols is None else np.asarray(cols, dtype=np.int64)
+    pos, found = align(row_ids, query)
+    out = np.zeros((query.size, cols.size))
+    if found.any():
+        rows = matrix[pos[found]][:, cols]
+        out[found] = rows.toarray() if sparse.issparse(rows) else rows
+    return out
+
+
+def trajectory(sample_ids: np.ndarray, row_ids: Sequence[str], matrix, names: List[str],
+               cols: Optional[Sequence[int]] = None) -> Dict[str, List[float]]:
+    """Feature name -> values over the (already sorted) samples; ``names`` label ``cols``."""
+    values = gather(row_ids, matrix, sample_ids, cols)
+    return {n: [round(float(v), 6) for v in values[:, j]] for j, n in enumerate(names)}
@@ -0,0 +1,105 @@
+"""Monte Carlo uncertainty for formulation scores.
+
+Every interaction ``score`` is a noisy pipeline output. Each edge gets a
+standard deviation pooled from its evidence tags (inverse-variance), edge scores
+are resampled from Beta distributions with that mean/variance, and the
+formulation score is evaluated for all draws at once as a (draws x edges)
+array. :func:`simulate` only takes plain arrays so it can run in a process pool.
+"""
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+COMPLEMENTARITY, INHIBITION, COMPETITION = 0, 1, 2
+SCORED_TYPES = {"complementarity": COMPLEMENTARITY, "inhibition": INHIBITION, "competition": COMPETITION}
+
+# Per-evidence standard deviation of the reported score. Unknown tags fall back
+# on keyword defaults below, then DEFAULT_SD.
+EVIDENCE_SD = {
+    "metaG_abundance_cooccur": 0.08,
+    "metaT_covariance_mock": 0.12,
+    "pathway_complement_mock": 0.12,
+    "pathway_conflict_mock": 0.12,
+    "inferred_resource_overlap_mock": 0.18,
+}
+KEYWORD_SD = (("inferred", 0.18), ("mock", 0.15), ("coculture", 0.05), ("assay", 0.05))
+DEFAULT_SD = 0.12
+
+
+def formulation_score(comp_sum, inhib_sum, compo_sum, inhib_count):
+    """The formulation scoring rule; works on scalars or arrays of per-draw sums."""
+    score = 0.1 + 0.2 * comp_sum - 0.3 * (inhib_sum + 0.5 * compo_sum)
+    if inhib_count:
+        score = score - 0.12 * (inhib_sum / max(1, inhib_count))
+    return np.clip(score, 0.0, 1.0)
+
+
+def evidence_sd(tag: str) -> float:
+    if tag in EVIDENCE_SD:
+        return EVIDENCE_SD[tag]
+    low = tag.lower()
+    for word, sd in KEYWORD_SD:
+        if word in low:
+            return sd
+    return DEFAULT_SD
+
+
+def edge_sd(edge: Dict[str, Any]) -> float:
+    """Inverse-variance pooled SD over the edge's evidence tags."""
+    if edge.get("score_sd") is not None:
+        return float(edge["score_sd"])
+    tags = edge.get("evidence") or []
+    if isinstance(tags, str):
+        tags = [tags]
+    if not tags:
+        return DEFAULT_SD
+    precision = sum(1.0 / evidence_sd(t) ** 2 for t in tags)
+    return float(np.sqrt(1.0 / precision))
+
+
+def subgraph_arrays(organisms: Sequence[str], edges: Sequence[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(mean scores, SDs, kinds) for the scored edges with both endpoints in ``organisms``."""
+    chosen = set(organisms or [])
+    picked = [
+        e for e in edges
+        if e.get("type") in SCORED_TYPES and e.get("source_isolate") in chosen and e.get("target_isolate") in chosen
+    ]
+    return (
+        np.array([float(e.get("score", 0.5)) for e in picked], dtype=np.float64),
+        np.array([edge_sd(e) for e in picked], dtype=np.float64),
+        np.array([SCORED_TYPES[e["type"]] for e in picked], dtype=np.int64),
+    )
+
+
+def sample_scores(means: np.ndarray, sds: np.ndarray, draws: int, rng: np.random.Generator) -> np.ndarray:
+    """(draws x edges) Beta samples with the given means/SDs (variance capped to stay a valid Beta)."""
+    m = np.clip(means, 1e-3, 1 - 1e-3)
+    var = np.minimum(sds ** 2, 0.9 * m * (1 - m))
+    var = np.maximum(var, 1e-12)
+    k = m * (1 - m) / var - 1
+    return rng.beta(m * k, (1 - m) * k, size=(draws, means.size))
+
+
+def simulate(means: np.ndarray, sds: np.ndarray, kinds: np.ndarray, draws: int = 10_000,
+             threshold: float = 0.5, seed: Optional[int] = None) -> Dict[str, Any]:
+    """Score distribution summary over ``draws`` resamples of the subgraph's edge scores."""
+    rng = np.random.default_rng(seed)
+    if means.size:
+        s = sample_scores(means, sds, draws, rng)
+        sums = s @ np.stack([kinds == COMPLEMENTARITY, kinds == INHIBITION, kinds == COMPETITION], axis=1).astype(np.float64)
+        scores = formulation_score(sums[:, 0], sums[:, 1], sums[:, 2], int((kinds == INHIBITION).sum()))
+    else:
+        scores = np.full(draws, float(formulation_score(0.0, 0.0, 0.0, 0)))
+    p5, p50, p95 = np.percentile(scores, [5, 50, 95])
+    return {
+        "draws": int(draws),
+        "edges": int(means.size),
+        "mean": round(float(scores.mean()), 4),
+        "std": round(float(scores.std()), 4),
+        "p5": round(float(p5), 4),
+        "p50": round(float(p50), 4),
+        "p95": round(float(p95), 4),
+        "threshold": threshold,
+        "p_exceed": round(float((scores > threshold).mean()), 4),
+    }
+
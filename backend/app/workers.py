@@ -0,0 +1,143 @@
+"""Bounded executor for CPU-heavy work (scoring, network layout, simulations, analytics).
+
+Async handlers ``await pool.run(fn, *args)``: the call is rejected straight away
+with 503 when ``max_pending`` jobs are already in flight (back-pressure instead
+of an unbounded queue) and answered with 504 after ``timeout`` seconds. Slots
+are only freed when the job really finishes, so timed-out work still counts
+against the limit. A worker that dies (OOM, segfault) breaks a process pool for
+good, so a broken executor is dropped, the call answered with 503, and the next
+call starts fresh workers. Cheap lookups never touch this pool and stay on the
+event loop.
+
+Worker processes are started with an explicit start method (forkserver, else
+spawn) rather than forking the threaded server, and prepared by ``initializer``.
+Cached background jobs go through :meth:`BoundedPool.submit`, which skips the
+request slots. Worker code raises :class:`TaskError` for client errors.
+"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import BrokenExecutor, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional, Sequence
+
+from fastapi import HTTPException
+
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class TaskError(Exception):
+    """Raised by pool-side code for a client error; :meth:`BoundedPool.run` turns it into an HTTPException."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(status_code, detail)
+
+
+class BoundedPool:
+    def __init__(self, max_workers: int, max_pending: int, timeout: float, kind: str = "process",
+                 start_method: str = START_METHOD, initializer: Optional[Callable[..., Any]] = None,
+                 initargs: Sequence[Any] = ()):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.kind = kind
+        self.start_method = start_method
+        self.initializer = initializer
+        self.initargs = tuple(initargs)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor: Optional[Executor] = None
+        self.in_flight = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.broken = 0
+
+    @property
+    def executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers, mp_context=multiprocessing.get_context(self.start_method),
+                        initializer=self.initializer, initargs=self.initargs)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, initializer=self.initializer, initargs=self.initargs)
+            return self._executor
+
+    def recycle(self):
+        """Replace the workers (e.g. after a data reload, so worker processes load the new dataset)."""
+        with self._lock:
+            old, self._executor = self._executor, None
+        if old is not None:
+            old.shutdown(wait=False)
+
+    def _discard(self, executor: Executor):
+        """Drop ``executor`` after it broke, unless it was already replaced."""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+            self.broken += 1
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        with self._lock:
+            old, self._executor = self._executor, None
+        if old is not None:
+            old.shutdown(wait=True, cancel_futures=True)
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Executor-style submit for cached background jobs: no slot, no timeout; a broken pool is replaced once."""
+        executor = self.executor
+        try:
+            return executor.submit(fn, *args, **kwargs)
+        except BrokenExecutor:
+            self._discard(executor)
+            return self.executor.submit(fn, *args, **kwargs)
+
+    def _release(self, _fut):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="server busy, retry later", headers={"Retry-After": "1"})
+        executor = self.executor
+        try:
+            fut = executor.submit(partial(fn, *args, **kwargs))
+        except BrokenExecutor:
+            self._slots.release()
+            self._discard(executor)
+            raise HTTPException(status_code=503, detail="worker pool restarting, retry later", headers={"Retry-After": "1"})
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self.in_flight += 1
+        fut.add_done_callback(self._release)
+        try:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(fut)), self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise HTTPException(status_code=504, detail=f"computation exceeded {self.timeout:g}s")
+        except BrokenExecutor:
+            self._discard(executor)
+            raise HTTPException(status_code=503, detail="worker crashed, retry later", headers={"Retry-After": "1"})
+        except TaskError as e:
+            raise HTTPException(status_code=e.args[0], detail=e.args[1])
+
+    def stats(self) -> dict:
+        return {
+            "kind": self.kind,
+            "start_method": self.start_method if self.kind == "process" else None,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "timeout_s": self.timeout,
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "broken": self.broken,
+        }
@@ -0,0 +1,163 @@
+"""Point-lookup latency with and without saturated heavy endpoints.
+
+Starts the API under uvicorn, measures point-lookup latency on an idle server,
+then again while several clients hammer the CPU-heavy endpoints
+(/formulations/preview with Monte Carlo bands, /network, /trajectories). The
+heavy clients run in their own process, so the timing loop only measures the
+server; they honour Retry-After like real clients. 503s from back-pressure are
+counted, not treated as failures.
+
+The run passes when the saturated lookup p99 stays within ``--max-p99-ratio`` of
+the idle p99 (exit status 1 otherwise). The verdict depends on the machine: the
+event loop, the pool workers and the load generator all need CPU, so compare
+runs on the same box and read the core count printed with the results.
+
+    python backend/benchmarks/bench_latency.py [--seconds 5] [--max-p99-ratio 1.5] [--out bench_output.txt]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+LOOKUPS = ["/health", "/isolates/I001", "/bins/B001/pathways"]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def lookup_loop(client: httpx.AsyncClient, until: float, out: list):
+    i = 0
+    while time.perf_counter() < until:
+        t = time.perf_counter()
+        r = await client.get(LOOKUPS[i % len(LOOKUPS)])
+        out.append((time.perf_counter() - t) * 1e3)
+        r.raise_for_status()
+        i += 1
+
+
+async def heavy_loop(client: httpx.AsyncClient, until: float, counts: dict, draws: int):
+    body = {"organisms": ["I001", "I002", "I003", "I004"]}
+    i = 0
+    while time.perf_counter() < until:
+        if i % 3 == 0:
+            r = await client.post("/formulations/preview", json=body, params={"uncertainty": 1, "draws": draws})
+        elif i % 3 == 1:
+            r = await client.get("/network", params={"max_neighbors": 500})
+        else:
+            r = await client.get("/trajectories")
+        counts[r.status_code] = counts.get(r.status_code, 0) + 1
+        if r.status_code == 503:  # behave like a real client and honour Retry-After
+            await asyncio.sleep(float(r.headers.get("Retry-After", "1")))
+        i += 1
+
+
+async def heavy_clients_main(base: str, until: float, clients: int, draws: int) -> dict:
+    counts: dict = {}
+    async with httpx.AsyncClient(base_url=base, timeout=60) as client:
+        await asyncio.gather(*(heavy_loop(client, until, counts, draws) for _ in range(clients)))
+    return counts
+
+
+def heavy_process(base: str, seconds: float, clients: int, draws: int, out):
+    out.put(asyncio.run(heavy_clients_main(base, time.perf_counter() + seconds, clients, draws)))
+
+
+async def lookups(base: str, until: float, clients: int) -> list:
+    latencies: list = []
+    async with httpx.AsyncClient(base_url=base, timeout=60) as client:
+        await asyncio.gather(*(lookup_loop(client, until, latencies) for _ in range(clients)))
+    return latencies
+
+
+def phase(base: str, seconds: float, lookup_clients: int, heavy_clients: int, draws: int):
+    counts: dict = {}
+    heavy = None
+    if heavy_clients:
+        ctx = multiprocessing.get_context("spawn")
+        queue = ctx.Queue()
+        heavy = ctx.Process(target=heavy_process, args=(base, seconds + 1, heavy_clients, draws, queue))
+        heavy.start()
+        time.sleep(1)  # let the pool fill up before measuring
+    lat = np.array(asyncio.run(lookups(base, time.perf_counter() + seconds, lookup_clients)))
+    if heavy is not None:
+        counts = queue.get(timeout=120)
+        heavy.join()
+    return {
+        "lookups": len(lat),
+        "p50_ms": round(float(np.percentile(lat, 50)), 2),
+        "p99_ms": round(float(np.percentile(lat, 99)), 2),
+        "heavy_status_counts": counts,
+    }
+
+
+async def wait_ready(base: str, timeout: float = 30):
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient(base_url=base) as client:
+        while time.perf_counter() < deadline:
+            try:
+                if (await client.get("/ready")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("server did not come up")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--lookup-clients", type=int, default=8)
+    ap.add_argument("--heavy-clients", type=int, default=32)
+    ap.add_argument("--draws", type=int, default=200_000)
+    ap.add_argument("--max-p99-ratio", type=float, default=1.5)
+    ap.add_argument("--out", type=Path, default=None)
+    args = ap.parse_args()
+
+    port = free_port()
+    env = {**os.environ, "ASMA_DATA_DIR": os.environ.get("ASMA_DATA_DIR", str(REPO_ROOT / "demo_data"))}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=REPO_ROOT, env=env, start_new_session=True,
+    )
+    base = f"http://127.0.0.1:{port}"
+    try:
+        asyncio.run(wait_ready(base))
+        idle = phase(base, args.seconds, args.lookup_clients, 0, args.draws)
+        loaded = phase(base, args.seconds, args.lookup_clients, args.heavy_clients, args.draws)
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            os.killpg(server.pid, signal.SIGKILL)
+
+    lines = [
+        f"{'phase':<10} {'lookups':>8} {'p50 ms':>8} {'p99 ms':>8}  heavy responses",
+        f"{'idle':<10} {idle['lookups']:>8} {idle['p50_ms']:>8} {idle['p99_ms']:>8}  -",
+        f"{'saturated':<10} {loaded['lookups']:>8} {loaded['p50_ms']:>8} {loaded['p99_ms']:>8}  {loaded['heavy_status_counts']}",
+    ]
+    ratio = loaded["p99_ms"] / idle["p99_ms"]
+    flat = ratio <= args.max_p99_ratio
+    lines.append(f"p99 ratio {ratio:.2f} (limit {args.max_p99_ratio:g}, {os.cpu_count()} CPU): {'flat' if flat else 'NOT flat'}")
+    report = "\n".join(lines)
+    print(report)
+    if args.out:
+        args.out.write_text(report + "\n", encoding="utf-8")
+    sys.exit(0 if flat else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,16 @@
 import os
+import tempfile
 import pytest
 from fastapi.testclient import TestClient
 
 # Ensure the app uses the repo's demo_data by default during tests.
 os.environ.setdefault("ASMA_DATA_DIR", "demo_data")
+# Saved formulations go to a scratch file so tests never rewrite demo_data/formulations.json.
+os.environ.setdefault("ASMA_FORMULATIONS_PATH", os.path.join(tempfile.mkdtemp(prefix="asma-tests-"), "formulations.json"))
+
+# Analytics, similarity and formulation scores run on a process pool that starts cold; on a slow runner
+# the default 2 s wait would answer 202 / "pending" and make the tests that expect results flaky.
+os.environ.setdefault("ASMA_ANALYTICS_WAIT_S", "60")
 
 from backend.app.main import app  # noqa: E402 (import after env set)
 
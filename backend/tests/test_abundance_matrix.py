@@ -0,0 +1,36 @@
+def test_abundance_matrix_one_call(client):
+    r = client.get("/abundance/matrix")
+    assert r.status_code == 200
+    payload = r.json()
+    assert "Streptococcus" in payload["taxa"]
+    rows = {s["sample_id"]: s for s in payload["samples"]}
+    s001 = rows["S001"]
+    assert s001["cohort"] == "Case"
+    assert s001["abundance"][payload["taxa"].index("Streptococcus")] == 0.32
+
+
+def test_abundance_cohorts_and_differential(client):
+    r = client.get("/abundance/cohorts", params={"field": "cohort"})
+    assert r.status_code == 200
+    groups = {g["cohort"]: g for g in r.json()["groups"]}
+    assert {"Case", "Control"} <= set(groups)
+
+    r = client.get("/abundance/differential", params={"field": "cohort", "case": "Case", "control": "Control"})
+    assert r.status_code == 200
+    payload = r.json()
+    assert payload["n_case"] >= 1 and payload["n_control"] >= 1
+    assert {"taxon", "log2_fold_change", "welch_t"} <= set(payload["taxa"][0])
+
+    assert client.get("/abundance/cohorts", params={"field": "age"}).status_code == 422
+
+
+def test_differential_uses_patients_as_units(client):
+    r = client.get("/abundance/differential", params={"field": "cohort", "case": "Case", "control": "Control"})
+    payload = r.json()
+    assert payload["unit"] == "patient"
+    rows = client.get("/abundance/matrix").json()["samples"]
+    assert payload["n_case"] == len({s["patient_id"] for s in rows if s["cohort"] == "Case"})
+    assert payload["n_case"] < sum(s["cohort"] == "Case" for s in rows)  # P001/P003 have two samples each
+
+    r = client.get("/abundance/differential", params={"field": "cohort", "case": "nope", "control": "Control"})
+    assert r.status_code == 400
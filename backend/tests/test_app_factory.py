@@ -0,0 +1,94 @@
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from backend.app import dataset
+from backend.app.main import create_app
+
+DEMO_DATA = Path(__file__).resolve().parents[2] / "demo_data"
+
+
+def wait_ready(client, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        r = client.get("/ready")
+        if r.json()["status"] != "starting" or time.monotonic() > deadline:
+            return r
+        time.sleep(0.05)
+
+
+def make_app(tmp_path, data_dir):
+    return create_app(data_dir, formulations_path=tmp_path / "formulations.json")
+
+
+def test_create_app_reads_nothing(tmp_path):
+    app = make_app(tmp_path, tmp_path / "missing")
+    assert app.state.dataset.status()["loaded"] == []
+    r = TestClient(app).get("/health")
+    assert r.status_code == 200
+    assert r.json()["status"] == "ok"
+
+
+def test_importing_the_app_skips_numpy():
+    probe = "import sys, backend.app.main; print(sorted(m for m in ('numpy', 'scipy') if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", probe], cwd=DEMO_DATA.parent, capture_output=True, text=True, check=True)
+    assert out.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_ready_after_warmup_leaves_interactions_lazy(tmp_path):
+    with TestClient(make_app(tmp_path, DEMO_DATA)) as client:
+        r = wait_ready(client)
+        assert r.status_code == 200
+        assert r.json()["status"] == "ready"
+        assert "interactions" not in r.json()["loaded"]
+        assert client.get("/isolates/I001").status_code == 200
+        assert "interactions" not in client.get("/ready").json()["loaded"]
+
+
+def test_missing_data_dir_reports_error(tmp_path):
+    with TestClient(make_app(tmp_path, tmp_path / "missing")) as client:
+        r = wait_ready(client)
+        assert r.status_code == 503
+        assert r.json()["status"] == "error"
+        assert "patients" in r.json()["errors"]
+        assert client.get("/patients").status_code == 503
+        assert client.get("/health").status_code == 200
+
+
+def test_broken_file_only_fails_dependent_endpoints(tmp_path):
+    data = tmp_path / "data"
+    shutil.copytree(DEMO_DATA, data)
+    (data / "interactions.json").write_text("{not json", encoding="utf-8")
+    with TestClient(make_app(tmp_path, data)) as client:
+        assert wait_ready(client).status_code == 200
+        assert client.get("/patients").status_code == 200
+        r = client.get("/analytics/graph")  # computed on the worker pool: the worker's load fails
+        assert r.status_code == 503
+        assert "interactions.json" in r.json()["detail"]
+        assert client.get("/formulations").status_code == 503  # diffed in this process
+        assert "interactions" in client.get("/ready").json()["errors"]
+
+
+def test_slow_load_does_not_block_event_loop_or_other_entities(tmp_path, monkeypatch):
+    filename, load = dataset.ENTITIES["isolates"]
+
+    def slow_load(path):
+        time.sleep(1.0)
+        return load(path)
+
+    monkeypatch.setitem(dataset.ENTITIES, "isolates", (filename, slow_load))
+    with TestClient(make_app(tmp_path, DEMO_DATA)) as client:
+        lookup = threading.Thread(target=client.get, args=("/isolates/I001",))
+        lookup.start()  # async handler waiting on the isolates load (warm-up is loading it too)
+        time.sleep(0.1)
+        t = time.monotonic()
+        assert client.get("/health").status_code == 200
+        assert client.get("/prebiotics").status_code == 200  # its own lock, not the isolates one
+        assert time.monotonic() - t < 0.5
+        lookup.join()
+        assert wait_ready(client).status_code == 200
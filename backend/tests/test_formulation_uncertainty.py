@@ -0,0 +1,37 @@
+import numpy as np
+
+from backend.app.uncertainty import simulate
+
+
+def test_preview_with_uncertainty(client):
+    body = {"organisms": ["I001", "I002", "I003", "I004"]}
+    r = client.post("/formulations/preview", json=body, params={"uncertainty": True, "draws": 5000, "seed": 7})
+    assert r.status_code == 200
+    payload = r.json()
+    dist = payload["score_distribution"]
+    assert dist["draws"] == 5000 and dist["edges"] >= 1
+    assert 0.0 <= dist["p5"] <= dist["p50"] <= dist["p95"] <= 1.0
+    assert 0.0 <= dist["p_exceed"] <= 1.0
+
+    assert "score_distribution" not in client.post("/formulations/preview", json=body).json()
+
+
+def test_preview_batch(client):
+    items = [{"organisms": ["I001", "I004"]}, {"organisms": ["I002", "I004"]}]
+    r = client.post("/formulations/preview/batch", json={"items": items}, params={"draws": 2000, "seed": 1})
+    assert r.status_code == 200
+    out = r.json()
+    assert [o["organisms"] for o in out] == [i["organisms"] for i in items]
+    assert all("p95" in o["score_distribution"] for o in out)
+
+
+def test_preview_batch_is_capped(client):
+    items = [{"organisms": ["I001", "I004"]}] * 101
+    assert client.post("/formulations/preview/batch", json={"items": items}).status_code == 422
+
+
+def test_simulate_without_noise_matches_point_score():
+    means = np.array([0.55])
+    kinds = np.array([0])  # one complementarity edge
+    dist = simulate(means, np.array([1e-6]), kinds, draws=1000, seed=0)
+    assert abs(dist["mean"] - (0.1 + 0.2 * 0.55)) < 1e-3
@@ -0,0 +1,124 @@
+import json
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from backend.app.dataset import Dataset, register
+from backend.app.formulations import FormulationStore, changed_isolates
+
+DEMO_DATA = Path(__file__).resolve().parents[2] / "demo_data"
+
+
+def test_formulations_list_and_get(client):
+    r = client.get("/formulations")
+    assert r.status_code == 200
+    ids = {f["formulation_id"] for f in r.json()}
+    assert {"F001", "F002"} <= ids
+
+    f = client.get("/formulations/F002").json()
+    assert f["score_status"] == "fresh"
+    assert 0.0 <= f["score_predicted"] <= 1.0
+    assert f["depends_on"]["isolates"] == ["I001", "I002", "I004"]
+    assert {"source": "I002", "target": "I004", "type": "complementarity"} in f["depends_on"]["edges"]
+    assert client.get("/formulations/NOPE").status_code == 404
+
+
+def test_save_formulation_scores_live(client):
+    body = {"organisms": ["I002", "I004"], "prebiotics": ["PB002"], "notes": "test mix"}
+    r = client.post("/formulations", json=body)
+    assert r.status_code == 200
+    saved = r.json()
+    preview = client.post("/formulations/preview", json=body).json()
+    assert saved["score_predicted"] == preview["score_predicted"]
+    assert client.get(f"/formulations/{saved['formulation_id']}").json()["organisms"] == ["I002", "I004"]
+
+    assert client.post("/formulations", json={"organisms": ["NOPE"]}).status_code == 400
+
+
+def test_invalidate_only_rescores_touching_formulations(tmp_path):
+    calls = []
+
+    def score(organisms):
+        calls.append(sorted(organisms))
+        return {"score_predicted": 0.5, "counts": {}, "edges_included": {"complementarity": [], "inhibition_or_competition": []}}
+
+    seed = [
+        {"formulation_id": "F001", "organisms": ["I001", "I004"]},
+        {"formulation_id": "F002", "organisms": ["I002", "I003"]},
+    ]
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        store = FormulationStore(tmp_path / "formulations.json", seed, ex)
+        store.rescore_all(score, "v1")
+        assert all(f["score_status"] == "fresh" for f in store.list_all(wait=5))
+        old = [{"source_isolate": "I001", "target_isolate": "I004", "type": "cooccurrence", "score": 0.6}]
+        new = [{"source_isolate": "I001", "target_isolate": "I004", "type": "cooccurrence", "score": 0.9}]
+        changed = changed_isolates([], [], old, new)
+        assert changed == {"I001", "I004"}
+        calls.clear()
+        assert store.invalidate(changed, score, "v2") == ["F001"]
+        assert store.get("F001", wait=5)["dataset_version"] == "v2"
+        assert store.get("F002", wait=5)["dataset_version"] == "v1"
+    assert calls == [["I001", "I004"]]
+
+
+def test_list_all_waits_once_for_all_pending(tmp_path):
+    release = threading.Event()
+
+    def score(organisms):
+        release.wait(5)
+        return {"score_predicted": 0.5, "counts": {}, "edges_included": {"complementarity": [], "inhibition_or_competition": []}}
+
+    seed = [{"formulation_id": f"F00{i}", "organisms": ["I001"]} for i in range(5)]
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        store = FormulationStore(tmp_path / "formulations.json", seed, ex)
+        store.rescore_all(score, "v1")
+        t = time.monotonic()
+        listed = store.list_all(wait=0.3)
+        assert time.monotonic() - t < 1.0
+        assert all(f["score_status"] == "pending" for f in listed)
+        release.set()
+
+
+def test_failed_score_reports_error_and_is_retried(tmp_path):
+    fail = [True]
+
+    def score(organisms):
+        if fail[0]:
+            raise RuntimeError("worker exploded")
+        return {"score_predicted": 0.5, "counts": {}, "edges_included": {"complementarity": [], "inhibition_or_competition": []}}
+
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        store = FormulationStore(tmp_path / "formulations.json", [{"formulation_id": "F001", "organisms": ["I001"]}], ex)
+        store.rescore_all(score, "v1")
+        assert store.list_all(wait=5)[0]["score_status"] == "error"  # the retry fails too
+        failed = store.get("F001", wait=5)
+        assert failed["score_status"] == "error" and "worker exploded" in failed["score_error"]
+        fail[0] = False
+        assert store.get("F001", wait=5)["score_status"] == "fresh"  # rescheduled on access
+        fail[0] = True
+        store.rescore_all(score, "v2")
+        store.list_all(wait=5)
+        fail[0] = False
+        assert store.invalidate(set(), score, "v3") == ["F001"]  # a reload retries it even if untouched
+        assert store.get("F001", wait=5)["dataset_version"] == "v3"
+
+
+def test_failed_reload_keeps_diff_base(tmp_path):
+    data = tmp_path / "data"
+    shutil.copytree(DEMO_DATA, data)
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        ds = register(Dataset(data, ex, tmp_path / "state" / "formulations.json"))  # thread-pool scoring reads ds
+        before = ds.formulation_store.get("F002", wait=5)["score_predicted"]
+        edges = json.loads((data / "interactions.json").read_text(encoding="utf-8"))
+        (data / "interactions.json").write_text("{broken", encoding="utf-8")
+        ds.reload()
+        assert "interactions" in ds.status()["errors"]
+        for e in edges:
+            if (e["source_isolate"], e["target_isolate"], e["type"]) == ("I002", "I004", "complementarity"):
+                e["score"] = 0.95
+        (data / "interactions.json").write_text(json.dumps(edges), encoding="utf-8")
+        ds.reload()
+        assert ds.formulation_store.get("F002", wait=5)["score_predicted"] > before
+    assert json.loads((data / "formulations.json").read_text(encoding="utf-8"))[0]["score_predicted"] == 0.68
@@ -0,0 +1,37 @@
+from backend.app.graph_analytics import compute_graph_analytics
+
+
+def test_graph_analytics_endpoint(client):
+    r = client.get("/analytics/graph")
+    assert r.status_code == 200
+    payload = r.json()
+    assert payload["type"] == "all"
+    assert "competition" in payload["types"]
+    node = payload["nodes"]["I003"]
+    assert node["degree"] >= 1
+    assert {"pagerank", "weighted_degree", "community"} <= set(node)
+    assert abs(sum(n["pagerank"] for n in payload["nodes"].values()) - 1.0) < 1e-3
+
+
+def test_graph_keystones_and_network_attributes(client):
+    r = client.get("/analytics/graph/keystones", params={"type": "competition", "k": 2})
+    assert r.status_code == 200
+    assert len(r.json()["isolates"]) == 2
+
+    r = client.get("/network", params={"analytics": True})
+    assert r.status_code == 200
+    payload = r.json()
+    assert payload["analytics"]["status"] in {"ready", "computing"}
+    if payload["analytics"]["status"] == "ready":
+        assert all("pagerank" in n for n in payload["nodes"])
+
+
+def test_label_propagation_splits_components():
+    isolates = [{"isolate_id": x} for x in "ABCD"]
+    edges = [
+        {"source_isolate": "A", "target_isolate": "B", "type": "cooccurrence", "score": 0.9},
+        {"source_isolate": "C", "target_isolate": "D", "type": "cooccurrence", "score": 0.8},
+    ]
+    res = compute_graph_analytics(isolates, edges)["by_type"]["all"]
+    comm = {k: v["community"] for k, v in res["nodes"].items()}
+    assert comm["A"] == comm["B"] and comm["C"] == comm["D"] and comm["A"] != comm["C"]
@@ -0,0 +1,47 @@
+from backend.app.pathways import build_pathway_matrix
+
+
+def test_pathway_threshold_query(client):
+    r = client.get("/pathways/bins", params={"pathway": "propionate_production", "min_score": 0.6})
+    assert r.status_code == 200
+    bins = r.json()["bins"]
+    assert [b["bin_id"] for b in bins] == ["B003"]
+    assert bins[0]["scores"]["propionate_production"] >= 0.6
+
+    r = client.get("/pathways/bins", params={"pathway": "propionate_production", "min_score": 0.9})
+    assert r.json()["bins"] == []
+    assert client.get("/pathways/bins", params={"pathway": "NOPE"}).status_code == 404
+
+
+def test_pathway_coverage_per_patient(client):
+    r = client.get("/pathways/coverage", params={"by": "patient", "pathway": "carbohydrate_metabolism"})
+    assert r.status_code == 200
+    cov = {row["patient_id"]: row["pathways"] for row in r.json()["coverage"]}
+    # B001 (S001 -> P001): abundance 0.32 * score 0.9
+    assert abs(cov["P001"]["carbohydrate_metabolism"] - 0.288) < 1e-6
+
+
+def test_pathway_enrichment(client):
+    r = client.get("/pathways/enrichment")
+    assert r.status_code == 200
+    payload = r.json()
+    assert payload["n_case"] >= 1 and payload["n_control"] >= 1
+    assert {"pathway", "log2_fold_change", "mean_case", "mean_control"} <= set(payload["pathways"][0])
+
+
+def test_pathway_enrichment_rejects_unknown_field(client):
+    assert client.get("/pathways/enrichment", params={"field": "age"}).status_code == 422
+
+
+def test_pathway_enrichment_rejects_unknown_labels(client):
+    r = client.get("/pathways/enrichment", params={"case": "nope"})
+    assert r.status_code == 400
+    assert "nope" in r.json()["detail"]
+
+
+def test_per_sample_coverage_does_not_inflate_resampled_patients():
+    bins = [{"bin_id": b, "sample_id": s, "abundance": 1.0, "pathways": ["p"]} for b, s in (("B1", "S1"), ("B2", "S2"), ("B3", "S3"))]
+    pm = build_pathway_matrix(bins)
+    patient_of_bin = ["P1", "P1", "P2"]  # P1 sampled twice
+    assert pm.coverage(patient_of_bin)[2].ravel().tolist() == [2.0, 1.0]
+    assert pm.coverage(patient_of_bin, per_sample=True)[2].ravel().tolist() == [1.0, 1.0]
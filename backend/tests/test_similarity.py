@@ -0,0 +1,26 @@
+from backend.app.similarity import MinHashLSH
+
+
+def test_similar_isolates_endpoint(client):
+    r = client.get("/isolates/I003/similar", params={"k": 3})
+    assert r.status_code == 200
+    payload = r.json()
+    assert payload["isolate_id"] == "I003"
+    assert isinstance(payload["similar"], list) and len(payload["similar"]) <= 3
+    assert all(s["isolate_id"] != "I003" for s in payload["similar"])
+
+    assert client.get("/isolates/NOPE/similar").status_code == 404
+
+
+def test_minhash_estimates_jaccard():
+    base = {f"pathway:p{i}" for i in range(40)}
+    index = MinHashLSH(bands=32, rows=4).build(
+        {
+            "A": base,
+            "B": base - {"pathway:p0", "pathway:p1"},  # J = 38/40
+            "C": {f"marker:m{i}" for i in range(40)},  # disjoint
+        }
+    )
+    hits = index.query("A", k=5)
+    assert [h["id"] for h in hits] == ["B"]
+    assert abs(hits[0]["jaccard_estimate"] - 0.95) < 0.1
@@ -0,0 +1,53 @@
+import numpy as np
+from scipy import sparse
+
+from backend.app.timeline import build_time_index, gather
+
+
+def test_samples_date_range(client):
+    r = client.get("/samples", params={"start": "2025-06-10", "end": "2025-06-30"})
+    assert r.status_code == 200
+    assert [s["sample_id"] for s in r.json()] == ["S002", "S003"]
+
+    r = client.get("/samples", params={"patient_id": "P001", "end": "2025-06-01"})
+    assert [s["sample_id"] for s in r.json()] == ["S001"]
+
+    assert client.get("/samples", params={"start": "2025-07-01", "end": "2025-06-01"}).status_code == 400
+
+
+def test_bins_date_range(client):
+    r = client.get("/bins", params={"start": "2025-07-01"})
+    assert r.status_code == 200
+    assert [b["bin_id"] for b in r.json()] == ["B004", "B005"]
+
+
+def test_patient_trajectory(client):
+    r = client.get("/patients/P001/trajectory", params={"taxon": "Streptococcus"})
+    assert r.status_code == 200
+    payload = r.json()
+    assert payload["dates"] == ["2025-06-01", "2025-06-15"]
+    assert payload["taxa"]["Streptococcus"] == [0.32, 0.0]
+    assert len(payload["pathways"]["mucin_degradation"]) == 2
+
+    assert client.get("/patients/NOPE/trajectory").status_code == 404
+
+
+def test_time_index_groups_patients_in_date_order():
+    samples = [
+        {"sample_id": "c", "patient_id": "P2", "collection_date": "2025-03-01"},
+        {"sample_id": "a", "patient_id": "P1", "collection_date": "2025-02-01"},
+        {"sample_id": "b", "patient_id": "P2", "collection_date": "2025-01-01"},
+        {"sample_id": "d", "patient_id": None, "collection_date": "2025-01-15"},
+        {"sample_id": "e", "patient_id": "P1", "collection_date": ""},
+    ]
+    idx = build_time_index(samples)
+    assert list(idx.sample_ids) == ["b", "d", "a", "c"]
+    assert list(idx.between(patient_id="P2")[1]) == ["b", "c"]
+    assert list(idx.between(patient_id="P1")[1]) == ["a"]
+    assert idx.undated == ["e"]
+
+
+def test_gather_sparse_rows_and_columns():
+    m = sparse.csr_matrix(np.arange(12, dtype=float).reshape(4, 3))
+    out = gather(["s1", "s2", "s3", "s4"], m, np.array(["s3", "zz", "s1"], dtype=object), cols=[2, 0])
+    assert out.tolist() == [[8.0, 6.0], [0.0, 0.0], [2.0, 0.0]]
@@ -0,0 +1,108 @@
+import asyncio
+import os
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+from backend.app import dataset, tasks
+from backend.app.workers import BoundedPool
+
+DEMO_DATA = str(Path(__file__).resolve().parents[2] / "demo_data")
+
+
+def worker_state(data_dir):
+    ds = dataset.worker_dataset(data_dir)
+    return "backend.app.main" in sys.modules, ds is dataset._WORKER.get(data_dir), ds.status()["loaded"], type(ds.executor).__name__
+
+
+def test_pool_rejects_when_full_and_times_out():
+    gate = threading.Event()
+    pool = BoundedPool(max_workers=1, max_pending=1, timeout=0.2, kind="thread")
+
+    async def scenario():
+        first = asyncio.ensure_future(pool.run(gate.wait, 5))
+        await asyncio.sleep(0.05)
+        with pytest.raises(HTTPException) as busy:
+            await pool.run(sum, [1, 2])
+        assert busy.value.status_code == 503
+        with pytest.raises(HTTPException) as slow:
+            await first
+        assert slow.value.status_code == 504
+        gate.set()
+        await asyncio.sleep(0.05)  # slot frees once the job actually finishes
+        assert await pool.run(sum, [1, 2]) == 3
+
+    asyncio.run(scenario())
+    assert pool.stats()["rejected"] == 1 and pool.stats()["timed_out"] == 1
+
+
+def test_heavy_endpoints_report_pool(client):
+    r = client.get("/admin/workers")
+    assert r.status_code == 200
+    assert r.json()["heavy_pool"]["kind"] == "process"
+
+
+def test_pool_replaces_broken_process_pool():
+    pool = BoundedPool(max_workers=1, max_pending=2, timeout=10)
+
+    async def scenario():
+        with pytest.raises(HTTPException) as crashed:
+            await pool.run(os._exit, 1)  # worker dies mid-task -> BrokenProcessPool
+        assert crashed.value.status_code == 503
+        assert await pool.run(sum, [1, 2]) == 3
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+    assert pool.stats()["broken"] == 1
+
+
+def test_worker_keeps_its_warmed_dataset_and_never_builds_the_app():
+    pool = BoundedPool(max_workers=1, max_pending=2, timeout=30, initializer=dataset.init_worker, initargs=(DEMO_DATA,))
+
+    async def scenario():
+        await pool.run(tasks.pathway_counts, DEMO_DATA)
+        return await pool.run(worker_state, DEMO_DATA)
+
+    try:
+        imported_main, warmed, loaded, executor = asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+    assert not imported_main
+    assert warmed
+    assert set(dataset.WORKER_ENTITIES) <= set(loaded)
+    assert executor == "ThreadPoolExecutor"
+
+
+def test_cancelled_job_is_resubmitted(tmp_path):
+    gate = threading.Event()
+    first = ThreadPoolExecutor(max_workers=1)
+    ds = dataset.Dataset(Path(DEMO_DATA), first, tmp_path / "formulations.json")
+    first.submit(gate.wait, 5)
+    queued = ds.job("answer", lambda: 42)
+    first.shutdown(wait=False, cancel_futures=True)  # what a broken pool does to queued jobs
+    gate.set()
+    assert queued.cancelled()
+    ds.executor = ThreadPoolExecutor(max_workers=1)
+    assert ds.job("answer", lambda: 42).result(timeout=5) == 42
+
+
+def test_lost_jobs_answer_503():
+    from backend.app.main import job_result, job_result_async  # not at module level: worker_state's module must not import main
+
+    cancelled, broken = Future(), Future()
+    cancelled.cancel()
+    broken.set_exception(BrokenProcessPool("worker died"))
+    for fut in (cancelled, broken):
+        with pytest.raises(HTTPException) as sync_err:
+            job_result(fut)
+        with pytest.raises(HTTPException) as async_err:
+            asyncio.run(job_result_async(fut))
+        assert sync_err.value.status_code == async_err.value.status_code == 503
+        assert async_err.value.headers["Retry-After"]